@@ -0,0 +1,101 @@
+import math
+import random
+import sys
+import time
+
+import degrees
+import lookup
+
+PAIRS = 100
+SEED = 0
+
+# Names sharing a prefix, and misspellings of them, that fuzzy name
+# search is timed on
+SHARED = 20000
+MISSPELLINGS = 200
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [pairs]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    pairs = int(sys.argv[2]) if len(sys.argv) > 2 else PAIRS
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    random.seed(SEED)
+    person_ids = sorted(degrees.people)
+    queries = [
+        (random.choice(person_ids), random.choice(person_ids))
+        for _ in range(pairs)
+    ]
+
+    searches = [
+        ("BFS", degrees.shortest_path),
+        ("Bidirectional BFS", degrees.bidirectional_shortest_path)
+    ]
+    results = compare(searches, queries)
+
+    print(f"{len(queries)} random pairs from {directory}")
+    for name, _ in searches:
+        explored, elapsed = results[name]
+        print(f"  {name}: {explored} nodes expanded, {elapsed:.3f}s")
+
+    # Every name shares the first group of its segments with thousands
+    # of others, which only indexing crowded groups again tells apart
+    keys = sorted(f"person {i}" for i in range(SHARED))
+    queries = [misspell(random.choice(keys)) for _ in range(MISSPELLINGS)]
+    print(f"{len(queries)} misspellings of {len(keys)} names sharing a prefix")
+    for name, crowded in [("Groups only", math.inf),
+                          ("Crowded groups indexed", lookup.CROWDED)]:
+        index = lookup.NameLookup(
+            keys, list(range(len(keys))), [0] * len(keys),
+            postings=lookup.Postings.build(keys, crowded)
+        )
+        start = time.perf_counter()
+        for query in queries:
+            index.fuzzy(query)
+        elapsed = (time.perf_counter() - start) / len(queries)
+        print(f"  {name}: {elapsed * 1000:.3f}ms per fuzzy search")
+
+
+def compare(searches, queries):
+    """
+    Run every search on every (source, target) query.
+    Return a dictionary mapping each search name to a tuple of
+    the total nodes expanded and the total wall time in seconds.
+
+    Raises an exception if two searches disagree on a path length.
+    """
+    results = {name: (0, 0) for name, _ in searches}
+    for source, target in queries:
+        lengths = set()
+        for name, search in searches:
+            start = time.perf_counter()
+            path = search(source, target)
+            elapsed = time.perf_counter() - start
+            explored, total = results[name]
+            results[name] = (explored + degrees.num_explored, total + elapsed)
+            lengths.add(None if path is None else len(path))
+        if len(lengths) != 1:
+            raise Exception(f"searches disagree on {source} to {target}")
+    return results
+
+
+def misspell(name):
+    """
+    Returns a name with one character deleted, inserted or replaced.
+    """
+    i = random.randrange(len(name))
+    edit = random.choice(["delete", "insert", "replace"])
+    if edit == "delete":
+        return name[:i] + name[i + 1:]
+    if edit == "insert":
+        return name[:i] + random.choice("aeiou") + name[i:]
+    return name[:i] + random.choice("aeiou") + name[i + 1:]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,26 @@
+import argparse
 import csv
+import gc
+import itertools
+import math
+import operator
+import os
 import sys
 
+from collections import Counter, OrderedDict, deque
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import landmarks
+import snapshot
+
+from graph import StarGraph
+from graph import SearchTree as GraphSearchTree
+from lookup import NameLookup
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -10,24 +30,32 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def _discard(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+        return node
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+            return self._discard(self.frontier.pop())
 
 
 class QueueFrontier(StackFrontier):
@@ -36,9 +64,7 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+            return self._discard(self.frontier.popleft())
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -49,64 +75,257 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed star graph, used instead of the
+# "movies" and "stars" sets when data is loaded with compact=True
+graph = None
+
+# Landmark distances precomputed for the compact graph by landmarks.py
+landmark_index = None
 
-def load_data(directory):
+# Prefix and fuzzy name index, read from the snapshot or built by
+# name_lookup when first needed
+lookup_index = None
+
+# Number of states expanded by the most recent search
+num_explored = 0
+
+# Number of search trees a batch keeps for reuse by later queries
+BATCH_TREES = 16
+
+# Number of CSV rows read and processed at a time while loading
+CHUNK_SIZE = 10000
+
+
+def load_data(directory, compact=False, details=True):
     """
     Load data from CSV files into memory.
+    Returns a summary dictionary with the number of people, movies and
+    stars loaded, a dictionary counting the rows rejected for each reason,
+    and the peak resident set size of the process in bytes (or None where
+    that cannot be measured).
+
+    The CSV files are streamed in chunks, and ids and repeated values are
+    interned so that every row referring to them shares one string.
+    If `details` is false, birth years, titles and release years are not
+    loaded and are None, for callers that only need the star graph.
+
+    If `compact` is true, the star graph is stored as a `StarGraph`
+    of integer arrays rather than as sets on each person and movie.
+    Compact data with details is also saved to a snapshot in `directory`,
+    which later compact loads memory-map instead of parsing the CSV files,
+    for as long as none of the CSV files change. Compact loads also pick up
+    any landmark index saved by landmarks.py to rule out searches
+    between unconnected people.
+    """
+    global graph, landmark_index, lookup_index, names, people, movies
+    graph = None
+    landmark_index = None
+    lookup_index = None
+    rejected = Counter()
+
+    if compact:
+        loaded = snapshot.load(directory)
+        if loaded is not None:
+            people, movies, names, graph, lookup_index = loaded
+            landmark_index = landmarks.LandmarkIndex.load(directory, graph)
+            return load_summary(len(graph.person_movies), rejected)
+
+    # Loading creates millions of objects but no reference cycles,
+    # so pause the cyclic garbage collector rather than rescan them all
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return load_csv(directory, compact, details, rejected)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_csv(directory, compact, details, rejected):
     """
+    Load data from CSV files into memory for load_data.
+    """
+    global graph, landmark_index, lookup_index, names, people, movies
+    names, people, movies = {}, {}, {}
+
+    # Births and years repeat often, so share one string per value
+    values = {}
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+    for chunk in read_rows(f"{directory}/people.csv",
+                           ["id", "name", "birth"], rejected):
+        for person_id, name, birth in chunk:
+            person_id = sys.intern(person_id)
+            if person_id in people:
+                rejected["people.csv: duplicate id"] += 1
+                continue
+            people[person_id] = {
+                "name": name,
+                "birth": values.setdefault(birth, birth) if details else None
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if not compact:
+                people[person_id]["movies"] = set()
+            if name.lower() not in names:
+                names[name.lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[name.lower()].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+    for chunk in read_rows(f"{directory}/movies.csv",
+                           ["id", "title", "year"], rejected):
+        for movie_id, title, year in chunk:
+            movie_id = sys.intern(movie_id)
+            if movie_id in movies:
+                rejected["movies.csv: duplicate id"] += 1
+                continue
+            movies[movie_id] = {
+                "title": title if details else None,
+                "year": values.setdefault(year, year) if details else None
             }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+            if not compact:
+                movies[movie_id]["stars"] = set()
+
+    if compact:
+        graph = StarGraph(list(people), list(movies), itertools.chain.from_iterable(
+            load_stars(directory, rejected)
+        ))
+        if details:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
+                lookup_index = snapshot.save(directory, people, movies,
+                                             graph)
+            except OSError:
                 pass
+        landmark_index = landmarks.LandmarkIndex.load(directory, graph)
+        return load_summary(len(graph.person_movies), rejected)
 
+    # Load stars
+    stars = 0
+    for chunk in load_stars(directory, rejected):
+        for person_id, movie_id in chunk:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        stars += len(chunk)
+    return load_summary(stars, rejected)
 
-def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+def read_rows(path, columns, rejected):
+    """
+    Yield lists of up to CHUNK_SIZE rows of a CSV file, each row a tuple
+    of its values in `columns`. Rows with the wrong number of fields are
+    skipped and counted in `rejected`.
+    """
+    filename = os.path.basename(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        try:
+            select = operator.itemgetter(
+                *[header.index(column) for column in columns]
+            )
+        except ValueError:
+            raise Exception(f"{path} must have columns {', '.join(columns)}")
+
+        while True:
+            rows = list(itertools.islice(reader, CHUNK_SIZE))
+            if not rows:
+                return
+            chunk = []
+            for row in rows:
+                if len(row) != len(header):
+                    rejected[f"{filename}: malformed row"] += 1
+                    continue
+                chunk.append(select(row))
+            yield chunk
+
+
+def load_stars(directory, rejected):
+    """
+    Yield lists of interned (person_id, movie_id) pairs from stars.csv,
+    skipping and counting in `rejected` rows that refer to people
+    or movies that were not loaded.
+    """
+    intern = sys.intern
+    for chunk in read_rows(f"{directory}/stars.csv",
+                           ["person_id", "movie_id"], rejected):
+        stars = []
+        for person_id, movie_id in chunk:
+            if person_id not in people:
+                rejected["stars.csv: unknown person_id"] += 1
+            elif movie_id not in movies:
+                rejected["stars.csv: unknown movie_id"] += 1
+            else:
+                stars.append((intern(person_id), intern(movie_id)))
+        yield stars
 
-    source = person_id_for_name(input("Name: "))
-    if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
-    if target is None:
-        sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+def load_summary(stars, rejected):
+    """
+    Returns the summary dictionary of a call to load_data.
+    """
+    return {
+        "people": len(people),
+        "movies": len(movies),
+        "stars": stars,
+        "rejected": dict(rejected),
+        "peak_rss": peak_rss()
+    }
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where that cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load a compact graph and snapshot it")
+    parser.add_argument("--topology-only", action="store_true",
+                        help="skip loading birth years, titles and years")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer tab-separated name pairs from FILE "
+                             "(or - for stdin) instead of prompting")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search each batch pair from both ends instead "
+                             "of growing one search per source")
+    args = parser.parse_args()
+    directory = args.directory
+    compact = args.compact
+
+    # Keep stdout for results when answering a batch
+    log = sys.stderr if args.batch else sys.stdout
+
+    # Load data from files into memory
+    print("Loading data...", file=log)
+    summary = load_data(directory, compact, not args.topology_only)
+    print("Data loaded.", file=log)
+    for reason, count in sorted(summary["rejected"].items()):
+        print(f"Skipped {count} rows ({reason}).", file=log)
+    if summary["peak_rss"] is not None:
+        print(f"Peak memory: {summary['peak_rss'] / 2 ** 20:.0f} MB.",
+              file=log)
+
+    if args.batch == "-":
+        run_batch(sys.stdin, sys.stdout, args.bidirectional)
+        return
+    elif args.batch:
+        with open(args.batch, encoding="utf-8") as f:
+            run_batch(f, sys.stdout, args.bidirectional)
+        return
+
+    source = prompt_person()
+    target = prompt_person()
+
+    path = bidirectional_shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -121,6 +340,121 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
+def prompt_person():
+    """
+    Prompts for a name and returns the matching person_id,
+    exiting with suggestions of similar names if there is none.
+    """
+    name = input("Name: ")
+    person_id = person_id_for_name(name)
+    if person_id is None:
+        suggestions = name_lookup().search(name, 5)
+        if suggestions:
+            print("Did you mean:")
+            for suggestion, _ in suggestions:
+                person = people[suggestion]
+                print(f"  {person['name']} (ID: {suggestion}, "
+                      f"Birth: {person['birth']})")
+        sys.exit("Person not found.")
+    return person_id
+
+
+def run_batch(lines, output, bidirectional=False):
+    """
+    Answer one tab-separated pair of names per line of `lines`,
+    writing a tab-separated line of both names, the degrees of
+    separation and the (movie_id, person_id) path to `output` as
+    each query is answered.
+
+    Queries from the same source reuse the search tree grown
+    for that source by earlier queries, unless `bidirectional` is
+    true, when each query searches from both ends instead, which is
+    faster where few queries share a source. Ambiguous names resolve
+    to the person in the most movies.
+    """
+    trees = OrderedDict()
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        try:
+            source_name, target_name = line.split("\t")
+        except ValueError:
+            print(f"{line}\t\terror\texpected two tab-separated names",
+                  file=output, flush=True)
+            continue
+
+        source = person_id_for_name(source_name, interactive=False)
+        target = person_id_for_name(target_name, interactive=False)
+        if source is None or target is None:
+            print(f"{source_name}\t{target_name}\terror\tperson not found",
+                  file=output, flush=True)
+            continue
+
+        if bidirectional:
+            path = bidirectional_shortest_path(source, target)
+        else:
+            if source in trees:
+                trees.move_to_end(source)
+            else:
+                trees[source] = SearchTree(source)
+                if len(trees) > BATCH_TREES:
+                    trees.popitem(last=False)
+            path = trees[source].path_to(target)
+
+        if path is None:
+            result = "none\t"
+        else:
+            steps = ";".join(f"{movie_id},{person_id}"
+                             for movie_id, person_id in path)
+            result = f"{len(path)}\t{steps}"
+        print(f"{source_name}\t{target_name}\t{result}",
+              file=output, flush=True)
+
+
+class SearchTree():
+    """
+    Breadth-first search tree grown from a single source only as far
+    as needed, so that paths to many targets can share one search.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        if graph is not None:
+            self.tree = GraphSearchTree(graph, graph.person_index[source])
+        else:
+            self.parents = {source: None}
+            self.frontier = deque([source])
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        if graph is not None:
+            path = self.tree.path_to(graph.person_index[target])
+            return None if path is None else graph.path_ids(path)
+
+        while target not in self.parents and self.frontier:
+            person_id = self.frontier.popleft()
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in self.parents:
+                    self.parents[neighbor] = (movie_id, person_id)
+                    self.frontier.append(neighbor)
+        if target not in self.parents:
+            return None
+
+        path = []
+        while self.parents[target] is not None:
+            movie_id, parent = self.parents[target]
+            path.append((movie_id, target))
+            target = parent
+        path.reverse()
+        return path
+
+
 def shortest_path(source, target):
     """
     Returns the shortest list of (movie_id, person_id) pairs
@@ -128,7 +462,22 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    global num_explored
     num_explored = 0
+
+    if graph is not None:
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+
+        # Landmarks prove that people in different components are not
+        # connected without searching the whole of the source's component
+        if landmark_index is not None:
+            if landmark_index.bounds(source, target)[0] == math.inf:
+                return None
+
+        path = graph.shortest_path(source, target)
+        num_explored = graph.num_explored
+        return None if path is None else graph.path_ids(path)
     
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
@@ -141,7 +490,7 @@ def shortest_path(source, target):
     while True:
 		
         if frontier.empty():
-            raise Exception("no solution")
+            return None
         
         node = frontier.remove()
         num_explored += 1
@@ -166,14 +515,119 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outwards
+    from both ends at once and joining the two frontiers in the middle.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    num_explored = 0
+
+    if graph is not None:
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        if landmark_index is not None:
+            if landmark_index.bounds(source, target)[0] == math.inf:
+                return None
+
+        path = graph.bidirectional_shortest_path(source, target)
+        num_explored = graph.num_explored
+        return None if path is None else graph.path_ids(path)
+
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # leading back towards the source (forwards) or the target (backwards)
+    forwards = {source: None}
+    backwards = {target: None}
+    forwards_frontier = [source]
+    backwards_frontier = [target]
+
+    while forwards_frontier and backwards_frontier:
+
+        # Always grow the smaller frontier by one whole level
+        if len(forwards_frontier) <= len(backwards_frontier):
+            frontier, reached, other = forwards_frontier, forwards, backwards
+        else:
+            frontier, reached, other = backwards_frontier, backwards, forwards
+
+        next_frontier = []
+        meeting = None
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in reached:
+                    continue
+                reached[neighbor] = (movie_id, person_id)
+                next_frontier.append(neighbor)
+                if neighbor in other:
+                    length = _depth(forwards, neighbor) + _depth(backwards, neighbor)
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, neighbor)
+
+        if meeting is not None:
+            return _join(forwards, backwards, meeting[1])
+
+        if reached is forwards:
+            forwards_frontier = next_frontier
+        else:
+            backwards_frontier = next_frontier
+
+    return None
+
+
+def _depth(parents, person_id):
+    """
+    Returns the number of steps from person_id back to the root
+    of a search tree.
+    """
+    depth = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        depth += 1
+    return depth
+
+
+def _join(forwards, backwards, middle):
+    """
+    Returns the (movie_id, person_id) path through the person where
+    the forwards and backwards search trees meet.
+    """
+    path = []
+    person_id = middle
+    while forwards[person_id] is not None:
+        movie_id, parent = forwards[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = middle
+    while backwards[person_id] is not None:
+        movie_id, child = backwards[person_id]
+        path.append((movie_id, child))
+        person_id = child
+    return path
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If not `interactive`, ambiguities resolve without prompting
+    to the person in the most movies.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and not interactive:
+        return min(person_ids, key=lambda person_id: (
+            -movie_count(person_id), person_id
+        ))
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -192,11 +646,41 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        return graph.person_offsets[person + 1] - graph.person_offsets[person]
+    return len(people[person_id]["movies"])
+
+
+def name_lookup():
+    """
+    Returns a `NameLookup` over everyone loaded, from the snapshot
+    if there is one, or else built the first time it is needed.
+    """
+    global lookup_index
+    if lookup_index is None:
+        lookup_index = NameLookup.build(
+            ((person_id, people[person_id]["name"]) for person_id in people),
+            movie_count
+        )
+    return lookup_index
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index[person_id])
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
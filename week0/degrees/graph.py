@@ -0,0 +1,279 @@
+from array import array
+from collections import deque
+
+
+class StarGraph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    People and movies are interned to dense integers and the edges
+    are stored as compressed sparse rows: the movies of person `p`
+    are `person_movies[person_offsets[p]:person_offsets[p + 1]]`,
+    and the stars of movie `m` are likewise found through
+    `movie_offsets` and `movie_stars`.
+    """
+
+    def __init__(self, person_ids, movie_ids, stars):
+        """
+        Build the graph from a list of person ids, a list of movie ids
+        and an iterable of (person_id, movie_id) pairs. Pairs that refer
+        to an unknown person or movie are skipped.
+        """
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: i for i, movie_id in enumerate(movie_ids)
+        }
+        self.num_explored = 0
+
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person_id, movie_id in stars:
+            person = self.person_index.get(person_id)
+            movie = self.movie_index.get(movie_id)
+            if person is None or movie is None:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+        self.person_offsets, self.person_movies = StarGraph.compress(
+            len(person_ids), edge_people, edge_movies
+        )
+        self.movie_offsets, self.movie_stars = StarGraph.compress(
+            len(movie_ids), edge_movies, edge_people
+        )
+
+    @classmethod
+    def from_arrays(cls, person_ids, movie_ids, person_index, movie_index,
+                    person_offsets, person_movies, movie_offsets, movie_stars):
+        """
+        Create a graph directly from prebuilt id sequences, id indexes
+        and adjacency arrays, such as those mapped from a snapshot.
+        """
+        graph = cls.__new__(cls)
+        graph.person_ids = person_ids
+        graph.movie_ids = movie_ids
+        graph.person_index = person_index
+        graph.movie_index = movie_index
+        graph.person_offsets = person_offsets
+        graph.person_movies = person_movies
+        graph.movie_offsets = movie_offsets
+        graph.movie_stars = movie_stars
+        graph.num_explored = 0
+        return graph
+
+    @classmethod
+    def compress(cls, size, rows, columns):
+        """
+        Counting-sort parallel arrays of (row, column) edges into
+        an offsets array of length `size + 1` and a column array.
+        """
+        offsets = array("i", bytes(4 * (size + 1)))
+        for row in rows:
+            offsets[row + 1] += 1
+        for i in range(size):
+            offsets[i + 1] += offsets[i]
+
+        cursor = offsets[:-1]
+        values = array("i", bytes(4 * len(rows)))
+        for row, column in zip(rows, columns):
+            values[cursor[row]] = column
+            cursor[row] += 1
+        return offsets, values
+
+    def neighbors(self, person):
+        """
+        Yield (movie, person) index pairs for everyone who starred
+        in a movie with `person`, including `person` themselves.
+        """
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for i in range(self.person_offsets[person],
+                       self.person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index.
+
+        If no possible path, returns None.
+        """
+        tree = SearchTree(self, source)
+        path = tree.path_to(target)
+        self.num_explored = tree.num_explored
+        return path
+
+    def bidirectional_shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index, searching
+        outwards from both ends at once and joining the two searches
+        where they meet.
+
+        If no possible path, returns None.
+        """
+        self.num_explored = 0
+        if source == target:
+            return []
+
+        # Parent person, connecting movie and distance of every person
+        # reached from the source (side 0) or the target (side 1)
+        people = len(self.person_ids)
+        parents = [array("i", [-1]) * people for _ in range(2)]
+        via = [array("i", [-1]) * people for _ in range(2)]
+        depths = [array("i", [0]) * people for _ in range(2)]
+        seen_movies = [bytearray(len(self.movie_ids)) for _ in range(2)]
+        parents[0][source] = source
+        parents[1][target] = target
+        frontiers = [[source], [target]]
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        while frontiers[0] and frontiers[1]:
+
+            # Always grow the smaller frontier by one whole level
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            reached, other = parents[side], parents[1 - side]
+            depth, other_depth = depths[side], depths[1 - side]
+
+            next_frontier = []
+            meeting = None
+            for person in frontiers[side]:
+                self.num_explored += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if seen_movies[side][movie]:
+                        continue
+                    seen_movies[side][movie] = 1
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if reached[star] != -1:
+                            continue
+                        reached[star] = person
+                        via[side][star] = movie
+                        depth[star] = depth[person] + 1
+                        next_frontier.append(star)
+                        if other[star] != -1:
+                            length = depth[star] + other_depth[star]
+                            if meeting is None or length < meeting[0]:
+                                meeting = (length, star)
+
+            if meeting is not None:
+                return self.join(parents, via, source, target, meeting[1])
+            frontiers[side] = next_frontier
+
+        return None
+
+    def join(self, parents, via, source, target, middle):
+        """
+        Returns the (movie, person) index path through the person where
+        the searches from the source and the target meet.
+        """
+        path = []
+        person = middle
+        while person != source:
+            path.append((via[0][person], person))
+            person = parents[0][person]
+        path.reverse()
+
+        person = middle
+        while person != target:
+            parent = parents[1][person]
+            path.append((via[1][person], parent))
+            person = parent
+        return path
+
+    def path_ids(self, path):
+        """
+        Converts a (movie, person) index path to (movie_id, person_id).
+        """
+        return [
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in path
+        ]
+
+
+class SearchTree():
+    """
+    Breadth-first search tree over a `StarGraph`, grown from a single
+    source only as far as needed, so that paths to many targets can
+    share one search.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.num_explored = 0
+
+        # Parent person and connecting movie of every reached person
+        self.parents = array("i", [-1]) * len(graph.person_ids)
+        self.via = array("i", [-1]) * len(graph.person_ids)
+        self.seen_movies = bytearray(len(graph.movie_ids))
+        self.parents[source] = source
+        self.frontier = deque([source])
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index.
+
+        If no possible path, returns None.
+        """
+        if self.parents[target] == -1:
+            self.grow(target)
+        if self.parents[target] == -1:
+            return None
+
+        path = []
+        person = target
+        while person != self.source:
+            path.append((self.via[person], person))
+            person = self.parents[person]
+        path.reverse()
+        return path
+
+    def grow(self, target):
+        """
+        Expand the frontier until target is reached or none is left.
+        """
+        person_offsets = self.graph.person_offsets
+        person_movies = self.graph.person_movies
+        movie_offsets = self.graph.movie_offsets
+        movie_stars = self.graph.movie_stars
+        parents = self.parents
+        via = self.via
+        seen_movies = self.seen_movies
+        frontier = self.frontier
+
+        while frontier:
+            person = frontier.popleft()
+            self.num_explored += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+
+                # Every star of a movie is reached the first time
+                # the movie is, so each movie is only walked once
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if parents[star] != -1:
+                        continue
+                    parents[star] = person
+                    via[star] = movie
+                    frontier.append(star)
+            if parents[target] != -1:
+                return
@@ -0,0 +1,311 @@
+import heapq
+import json
+import math
+import os
+import sys
+
+from array import array
+
+import snapshot
+
+FILENAME = "degrees.landmarks"
+LANDMARKS = 16
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = 255
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a few landmark people to everyone
+    in a `StarGraph`. By the triangle inequality, for any landmark `l`
+
+        |d(l, a) - d(l, b)| <= d(a, b) <= d(l, a) + d(l, b)
+
+    so the index bounds the degrees of separation between any two
+    people without searching, and its lower bound is a consistent
+    A* heuristic for exact searches.
+    """
+
+    def __init__(self, graph, landmarks, distances, components):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        self.components = components
+        self.num_explored = 0
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS):
+        """
+        Choose `count` landmarks and compute their distances.
+
+        Landmarks only go to large components: the largest, and any
+        holding at least a `count`th of everyone. People in the same
+        small component are still known to be connected, by their
+        component labels. The first landmark is the person in the most
+        movies. Each next one is the person in the most movies of a
+        large component no landmark reaches yet, and after that the
+        person farthest from all landmarks chosen so far.
+        """
+        people = len(graph.person_ids)
+        offsets = graph.person_offsets
+        movie_counts = [offsets[p + 1] - offsets[p] for p in range(people)]
+        components = connected_components(graph)
+
+        sizes = {}
+        for component in components:
+            sizes[component] = sizes.get(component, 0) + 1
+        largest = max(sizes.values(), default=0)
+        large = {component for component, size in sizes.items()
+                 if size == largest or size * count >= people}
+        candidates = [p for p in range(people)
+                      if movie_counts[p] and components[p] in large]
+
+        landmarks = []
+        distances = []
+        nearest = [UNREACHED] * people
+        while len(landmarks) < min(count, len(candidates)):
+            landmark = max(candidates, key=lambda p: (
+                nearest[p], movie_counts[p]
+            ))
+            if nearest[landmark] == 0:
+                break
+            landmarks.append(landmark)
+            distances.append(breadth_first_distances(graph, landmark))
+            nearest = [min(n, d) for n, d in zip(nearest, distances[-1])]
+        return cls(graph, landmarks, distances, components)
+
+    def bounds(self, a, b):
+        """
+        Returns lower and upper bounds on the degrees of separation
+        between person indexes `a` and `b`, either of which may be
+        `math.inf` if the people cannot be connected.
+        """
+        if a == b:
+            return 0, 0
+        if self.components[a] != self.components[b]:
+            return math.inf, math.inf
+        lower, upper = 1, math.inf
+        for distance in self.distances:
+            da = distance[a]
+            db = distance[b]
+            if da == UNREACHED or db == UNREACHED:
+                continue
+            lower = max(lower, abs(da - db))
+            upper = min(upper, da + db)
+        return lower, upper
+
+    def distance(self, source, target):
+        """
+        Returns lower and upper bounds on the degrees of separation
+        between the people with ids `source` and `target`.
+        """
+        index = self.graph.person_index
+        return self.bounds(index[source], index[target])
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index,
+        found by A* search guided by the landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        self.num_explored = 0
+        if source == target:
+            return []
+        if self.bounds(source, target)[0] == math.inf:
+            return None
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+        targets = [distance[target] for distance in self.distances]
+        distances = list(zip(targets, self.distances))
+
+        def heuristic(person):
+            h = 0
+            for dt, distance in distances:
+                dp = distance[person]
+                if dp == UNREACHED or dt == UNREACHED:
+                    continue
+                if dp - dt > h:
+                    h = dp - dt
+                elif dt - dp > h:
+                    h = dt - dp
+            return h
+
+        # Best known cost of reaching each person, and of leaving
+        # through each movie, with the parent person and movie of each
+        cost = {source: 0}
+        movie_cost = {}
+        parents = {source: (None, None)}
+        frontier = [(heuristic(source), 0, source)]
+
+        while frontier:
+            _, g, person = heapq.heappop(frontier)
+            g = -g
+            if g > cost[person]:
+                continue
+            self.num_explored += 1
+            if person == target:
+                path = []
+                while person != source:
+                    movie, parent = parents[person]
+                    path.append((movie, person))
+                    person = parent
+                path.reverse()
+                return path
+
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie_cost.get(movie, math.inf) <= g:
+                    continue
+                movie_cost[movie] = g
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if cost.get(star, math.inf) <= g + 1:
+                        continue
+                    cost[star] = g + 1
+                    parents[star] = (movie, person)
+                    heapq.heappush(frontier,
+                                   (g + 1 + heuristic(star), -g - 1, star))
+        return None
+
+    def save(self, directory):
+        """
+        Write the index to `directory`, stamped with the signature of
+        the CSV files it was computed from.
+        """
+        path = os.path.join(directory, FILENAME)
+        header = json.dumps({
+            "sources": snapshot.signature(directory),
+            "landmarks": [self.graph.person_ids[p] for p in self.landmarks]
+        }).encode("utf-8")
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for distance in self.distances:
+                distance.tofile(f)
+            self.components.tofile(f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, directory, graph):
+        """
+        Read the index saved in `directory` for `graph`.
+        Returns None if there is none or the CSV files have changed.
+        """
+        path = os.path.join(directory, FILENAME)
+        try:
+            with open(path, "rb") as f:
+                length = int.from_bytes(f.read(8), "little")
+                header = json.loads(f.read(length).decode("utf-8"))
+                if header["sources"] != snapshot.signature(directory):
+                    return None
+                distances = []
+                for _ in header["landmarks"]:
+                    distance = array("B")
+                    distance.fromfile(f, len(graph.person_ids))
+                    distances.append(distance)
+                components = array("I")
+                components.fromfile(f, len(graph.person_ids))
+        except (OSError, EOFError, ValueError, KeyError):
+            return None
+        landmarks = [graph.person_index[id] for id in header["landmarks"]]
+        return cls(graph, landmarks, distances, components)
+
+
+def connected_components(graph):
+    """
+    Returns an array labelling every person in graph with a number
+    shared by exactly the people they are connected to.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    people = len(graph.person_ids)
+    unlabelled = people
+    components = array("I", [unlabelled]) * people
+    seen_movies = bytearray(len(graph.movie_ids))
+    label = 0
+    for source in range(people):
+        if components[source] != unlabelled:
+            continue
+        components[source] = label
+        frontier = [source]
+        while frontier:
+            person = frontier.pop()
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if components[star] == unlabelled:
+                        components[star] = label
+                        frontier.append(star)
+        label += 1
+    return components
+
+
+def breadth_first_distances(graph, source):
+    """
+    Returns an array of the degrees of separation from source to every
+    person in graph, with UNREACHED for people in other components.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    distances = array("B", [UNREACHED]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier and depth + 1 < UNREACHED:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if distances[star] == UNREACHED:
+                        distances[star] = depth
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return distances
+
+
+def main():
+    # degrees imports this module to load the index, so only the
+    # command line, which loads data itself, imports degrees
+    import degrees
+
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Data loaded.")
+
+    index = LandmarkIndex.build(degrees.graph, count)
+    index.save(directory)
+    print(f"Saved {len(index.landmarks)} landmarks to "
+          f"{os.path.join(directory, FILENAME)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+import bisect
+import functools
+import heapq
+import itertools
+import zlib
+
+from array import array
+
+# Most edits fuzzy search finds matches within through the segment
+# index; searches allowing more check every name of a suitable length
+EDITS = 2
+
+# Segments of a name the index is keyed by together, and the number
+# each name is split into, so that a name within EDITS edits of a query
+# keeps at least GROUP of them unchanged. Larger groups find fewer names
+# that are not matches, at the cost of more lookups and postings
+GROUP = 3
+SEGMENTS = EDITS + GROUP
+GROUPS = list(itertools.combinations(range(SEGMENTS), GROUP))
+
+# Most names a group is checked for by itself. The names sharing a
+# more common group, such as those with a common prefix, are indexed
+# again by the groups of the rest of their text
+CROWDED = 32
+
+# Low bits of a posting entry holding the position of a name
+POSITION = (1 << 32) - 1
+
+# Most high bits of a group key by which postings are bucketed, so
+# that binary search only has to search one bucket of a few entries
+BUCKET_BITS = 16
+
+
+class NameLookup():
+    """
+    Index of people by lowercase name supporting exact, prefix and
+    typo-tolerant search, with results ranked by number of movies.
+
+    Names are kept in a sorted array, so a prefix is a contiguous run
+    found by binary search, and a segment tree over their movie counts
+    yields the people in the most movies in any run without scanning it.
+
+    Every name is also split into SEGMENTS segments, and indexed by each
+    group of GROUP of them. A name within EDITS edits of a query leaves
+    some group unchanged, each segment shifted by no more than the edits
+    before it, so fuzzy search only looks up the substrings of the query
+    that could be such a group, and checks the few names found. Where
+    more than CROWDED names share a group, the rest of the query is
+    looked up the same way among the rest of their text.
+    """
+
+    def __init__(self, keys, person_ids, movie_counts, tree=None,
+                 postings=None):
+        """
+        Wrap sequences of sorted lowercase names and the person_ids and
+        movie counts at the same positions. The segment tree and the
+        `Postings` of segment groups are built unless given, as a
+        snapshot gives them.
+        """
+        self.keys = keys
+        self.person_ids = person_ids
+        self.movie_counts = movie_counts
+
+        # Leaf `size + i` of the tree is name i, and every other node
+        # holds the position of the name in the most movies below it
+        self.size = 1
+        while self.size < len(self.keys):
+            self.size *= 2
+        if tree is None:
+            tree = array("i", [-1]) * (2 * self.size)
+            for i in range(len(self.keys)):
+                tree[self.size + i] = i
+            for node in range(self.size - 1, 0, -1):
+                tree[node] = self.best(tree[2 * node], tree[2 * node + 1])
+        self.tree = tree
+
+        if postings is None:
+            postings = Postings.build(self.keys)
+        self.postings = postings
+
+    @classmethod
+    def build(cls, people, movie_count):
+        """
+        Build the index from an iterable of (person_id, name) pairs
+        and a function returning the number of movies of a person_id.
+        """
+        entries = sorted((name.lower(), person_id) for person_id, name in people)
+        person_ids = [person_id for _, person_id in entries]
+        return cls(
+            [key for key, _ in entries], person_ids,
+            array("i", [movie_count(person_id) for person_id in person_ids])
+        )
+
+    def best(self, a, b):
+        """
+        Returns whichever of two positions has more movies,
+        preferring the first name alphabetically on a tie.
+        """
+        if a == -1 or (b != -1 and self.movie_counts[b] > self.movie_counts[a]):
+            return b
+        return a
+
+    def top(self, start, end, limit):
+        """
+        Returns the positions in range(start, end) of the `limit`
+        people with the most movies, most movies first.
+        """
+        heap = []
+
+        def push(node):
+            i = self.tree[node]
+            if i != -1:
+                heapq.heappush(heap, (-self.movie_counts[i], i, node))
+
+        # Cover the range with O(log n) subtrees of the segment tree
+        low, high = start + self.size, end + self.size
+        while low < high:
+            if low % 2:
+                push(low)
+                low += 1
+            if high % 2:
+                high -= 1
+                push(high)
+            low //= 2
+            high //= 2
+
+        # Expand the best subtree until its best leaf comes out on top
+        positions = []
+        while heap and len(positions) < limit:
+            _, i, node = heapq.heappop(heap)
+            if node >= self.size:
+                positions.append(i)
+            else:
+                push(2 * node)
+                push(2 * node + 1)
+        return positions
+
+    def rank(self, positions, distances=None):
+        """
+        Returns (person_id, name) pairs for positions in the index,
+        closest first when distances are given, then most movies first.
+        """
+        distances = distances or {}
+        ranked = sorted(positions, key=lambda i: (
+            distances.get(i, 0), -self.movie_counts[i],
+            self.keys[i]
+        ))
+        return [(self.person_ids[i], self.keys[i]) for i in ranked]
+
+    def exact(self, name):
+        """
+        Returns every (person_id, name) pair with exactly this name,
+        ignoring case, most movies first.
+        """
+        key = name.lower()
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_right(self.keys, key, start)
+        return self.rank(range(start, end))
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (person_id, name) pairs whose name starts
+        with `prefix`, ignoring case, most movies first.
+        """
+        key = prefix.lower()
+        start = bisect.bisect_left(self.keys, key)
+
+        # Every name with the prefix sorts before the prefix followed
+        # by the greatest possible character
+        end = bisect.bisect_left(self.keys, key + chr(0x10FFFF), start)
+        return self.rank(self.top(start, end, limit))
+
+    def fuzzy(self, name, limit=10, max_distance=None):
+        """
+        Returns up to `limit` (person_id, name) pairs whose name is within
+        `max_distance` edits of `name`, ignoring case, closest first.
+        By default one edit is allowed for names of up to five characters
+        and two for longer names.
+        """
+        key = name.lower()
+        if max_distance is None:
+            max_distance = 1 if len(key) <= 5 else 2
+
+        # A match of each length keeps some group of that length's
+        # segments, which the query has where the edits before, between
+        # and after them have shifted them to
+        if max_distance > EDITS:
+            candidates = range(len(self.keys))
+        else:
+            candidates = set()
+            for length in range(max(0, len(key) - max_distance),
+                                len(key) + max_distance + 1):
+                for seed, spans in probes(length, len(key), max_distance):
+                    candidates.update(self.postings.search(
+                        key, length, seed, spans, max_distance
+                    ))
+
+        distances = {}
+        matches = bit_vectors(key)
+        for i in candidates:
+            candidate = self.keys[i]
+            if abs(len(candidate) - len(key)) > max_distance:
+                continue
+            distance = edit_distance(key, candidate, max_distance, matches)
+            if distance <= max_distance:
+                distances[i] = distance
+        return self.rank(distances, distances)[:limit]
+
+    def search(self, name, limit=10):
+        """
+        Returns up to `limit` ranked (person_id, name) pairs for `name`:
+        exact matches, then prefix matches, then close misspellings.
+        """
+        results = []
+        for matches in [self.exact(name), self.prefix(name, limit),
+                        self.fuzzy(name, limit)]:
+            for match in matches:
+                if match not in results:
+                    results.append(match)
+        return results[:limit]
+
+
+class Postings():
+    """
+    Positions of the names having each group of segments, as one sorted
+    array of entries holding a `group_key` in their high 32 bits and a
+    position in their low 32 bits, so that it can be memory-mapped from
+    a snapshot and searched by binary search.
+    """
+
+    def __init__(self, entries, buckets, crowded=CROWDED):
+        """
+        Wrap the sorted entries, and the position of the first entry
+        in each of a power of two buckets of keys sharing their high bits,
+        followed by the number of entries. Groups of more than `crowded`
+        names must have been indexed again by the rest of their text.
+        """
+        self.entries = entries
+        self.buckets = buckets
+        self.crowded = crowded
+        self.shift = 33 - (len(buckets) - 1).bit_length()
+
+    @classmethod
+    def build(cls, keys, crowded=CROWDED):
+        """
+        Build the postings of a sequence of names, indexing the names of
+        groups of more than `crowded` of them again.
+        """
+        entries = []
+        for i, key in enumerate(keys):
+            for seed, spans in groups(len(key)):
+                hashed = group_key(seed, segment_text(key, spans))
+                entries.append(hashed << 32 | i)
+        entries.sort()
+
+        # Index the rest of the names of crowded groups by the groups
+        # of their rest, salted with the group they share, as `search`
+        # looks them up
+        crowds = set()
+        members = set()
+        for hashed, run in itertools.groupby(entries, lambda e: e >> 32):
+            run = list(run)
+            if len(run) > crowded:
+                crowds.add(hashed)
+                members.update(entry & POSITION for entry in run)
+        if crowds:
+            for i in sorted(members):
+                key = keys[i]
+                for seed, spans in groups(len(key)):
+                    hashed = group_key(seed, segment_text(key, spans))
+                    remainder = rest_text(key, spans)
+                    if hashed not in crowds or len(remainder) == len(key):
+                        continue
+                    for salt, parts in groups(len(remainder)):
+                        salted = group_key(salt ^ hashed,
+                                           segment_text(remainder, parts))
+                        entries.append(salted << 32 | i)
+            entries.sort()
+
+        bits = min(BUCKET_BITS, len(entries).bit_length())
+        counts = array("q", [0]) * (1 << bits)
+        for entry in entries:
+            counts[entry >> (64 - bits)] += 1
+        buckets = array("q", [0])
+        buckets.extend(itertools.accumulate(counts))
+        return cls(array("Q", entries), buckets, crowded)
+
+    def find(self, hashed):
+        """
+        Returns the (start, end) of the entries with a given `group_key`.
+        """
+        bucket = hashed >> self.shift
+        low, high = self.buckets[bucket], self.buckets[bucket + 1]
+        start = bisect.bisect_left(self.entries, hashed << 32, low, high)
+        end = bisect.bisect_left(self.entries, hashed + 1 << 32, start, high)
+        return start, end
+
+    def get(self, hashed):
+        """
+        Returns the positions of the names with a given `group_key`.
+        """
+        start, end = self.find(hashed)
+        return [entry & POSITION for entry in self.entries[start:end]]
+
+    def search(self, key, length, seed, spans, edits):
+        """
+        Returns the positions of names of a given length that may be
+        within `edits` edits of `key` keeping the group with a given seed
+        unchanged at the spans of `key` from `probes`.
+
+        Every edit is then in the rest of the name, so where the group
+        is crowded the rest of `key` is probed for among the rest of the
+        names sharing it, rather than returning all of them.
+        """
+        hashed = group_key(seed, segment_text(key, spans))
+        first, last = self.find(hashed)
+        if last - first > self.crowded and spans[-1][1] > spans[0][0]:
+            remainder = rest_text(key, spans)
+            size = length - (len(key) - len(remainder))
+
+            positions = []
+            for salt, parts in probes(size, len(remainder), edits):
+                salted = group_key(salt ^ hashed,
+                                   segment_text(remainder, parts))
+                positions.extend(self.get(salted))
+
+                # Checking the whole group is no slower by then
+                if len(positions) >= last - first:
+                    break
+            else:
+                return positions
+        return [entry & POSITION for entry in self.entries[first:last]]
+
+
+def layout(length):
+    """
+    Returns the (start, size) of each of the SEGMENTS segments of a
+    name of a given length, with the longer segments last.
+    """
+    size, longer = divmod(length, SEGMENTS)
+    segments = []
+    start = 0
+    for k in range(SEGMENTS):
+        segments.append((start, size + (k >= SEGMENTS - longer)))
+        start += segments[-1][1]
+    return segments
+
+
+@functools.lru_cache(maxsize=None)
+def groups(length):
+    """
+    Returns a (seed, spans) pair for each group of segments of names
+    of a given length: the `group_key` seed of the group, and the
+    (start, end) of each of its segments.
+    """
+    segments = layout(length)
+    result = []
+    for group in GROUPS:
+        seed = zlib.crc32(":".join(map(str, (length, *group))).encode("utf-8"))
+        result.append((seed, [(start, start + size) for start, size in [
+            segments[k] for k in group
+        ]]))
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def probes(length, size, edits):
+    """
+    Returns a (seed, spans) pair for each place in a query of `size`
+    characters where, with at most `edits` edits, a name of a given
+    length can have the first GROUP of its segments left unchanged.
+    Each segment moves by the insertions less the deletions before
+    it, and each segment skipped before it took an edit too.
+    """
+    result = []
+    for group, (seed, spans) in zip(GROUPS, groups(length)):
+        for shift in itertools.product(range(-edits, edits + 1),
+                                       repeat=GROUP):
+            needed = abs(size - length - shift[-1])
+            previous, after = 0, 0
+            for k, moved in zip(group, shift):
+                needed += max(abs(moved - previous), k - after)
+                previous, after = moved, k + 1
+            placed = [(start + moved, end + moved)
+                      for (start, end), moved in zip(spans, shift)]
+            if (needed <= edits and placed[0][0] >= 0
+                    and placed[-1][1] <= size):
+                result.append((seed, placed))
+    return result
+
+
+def segment_text(key, spans):
+    """
+    Returns the text of a group of segments of a name.
+    """
+    return "".join([key[start:end] for start, end in spans])
+
+
+def rest_text(key, spans):
+    """
+    Returns the text of a name outside a group of its segments.
+    """
+    starts = [0] + [end for _, end in spans]
+    ends = [start for start, _ in spans] + [len(key)]
+    return "".join([key[start:end] for start, end in zip(starts, ends)])
+
+
+def group_key(seed, text):
+    """
+    Returns a 32 bit hash, the same in every process, of the text of a
+    group of segments, given the seed of the group from `groups`. Two
+    groups sharing a hash only make fuzzy search check an extra name.
+    """
+    return zlib.crc32(text.encode("utf-8"), seed)
+
+
+def bit_vectors(a):
+    """
+    Returns a dictionary mapping each character of a string to a
+    bit mask of the positions it occurs at, for edit_distance.
+    """
+    matches = {}
+    for i, character in enumerate(a):
+        matches[character] = matches.get(character, 0) | 1 << i
+    return matches
+
+
+def edit_distance(a, b, limit, matches=None):
+    """
+    Returns the Levenshtein distance between two strings,
+    or `limit + 1` if it is greater than `limit`. Passing the
+    `bit_vectors` of a saves computing them for each b.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a:
+        return min(len(b), limit + 1)
+
+    # Myers' bit-parallel algorithm: bit i of the vertical deltas says
+    # whether the distance grows (pv) or shrinks (mv) between prefixes
+    # of a of length i and i + 1, updated a whole column per character
+    # of b, while `distance` follows the bottom of the column
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    if matches is None:
+        matches = bit_vectors(a)
+    pv, mv = full, 0
+    distance = len(a)
+    for character in b:
+        eq = matches.get(character, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return min(distance, limit + 1)
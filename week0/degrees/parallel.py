@@ -0,0 +1,207 @@
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from array import array
+
+import degrees
+import snapshot
+
+PAIRS = 20
+SEED = 0
+
+# Frontiers smaller than this are expanded without the pool
+THRESHOLD = 2048
+
+# Number of chunks each frontier level is split into per process
+CHUNKS = 4
+
+# Graph and search state of the current process, set by `attach`
+graph = None
+visited = None
+seen_movies = None
+
+
+class ParallelSearch():
+    """
+    Level-synchronous breadth-first search over the compact graph of
+    a snapshot, with each frontier level split across a process pool.
+
+    Every process memory-maps the same read-only snapshot and reads the
+    people and movies reached so far from shared arrays, which only the
+    parent process writes to, between levels. The parent process is
+    attached like a worker and expands small levels itself.
+    """
+
+    def __init__(self, directory, processes=None):
+        loaded = snapshot.load(directory)
+        if loaded is None:
+            raise Exception(f"no up to date snapshot in {directory}")
+        self.graph = loaded[3]
+        self.processes = processes or os.cpu_count()
+        self.visited = multiprocessing.RawArray(
+            "b", len(self.graph.person_ids)
+        )
+        self.seen_movies = multiprocessing.RawArray(
+            "b", len(self.graph.movie_ids)
+        )
+        self.pool = multiprocessing.Pool(
+            self.processes, initializer=attach,
+            initargs=(directory, self.visited, self.seen_movies)
+        )
+        attach(directory, self.visited, self.seen_movies, self.graph)
+        self.num_explored = 0
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index.
+
+        If no possible path, returns None.
+        """
+        self.num_explored = 0
+        if source == target:
+            return []
+
+        people = len(self.graph.person_ids)
+        parents = array("i", [-1]) * people
+        via = array("i", [-1]) * people
+        visited[:] = bytes(people)
+        seen_movies[:] = bytes(len(self.graph.movie_ids))
+        visited[source] = 1
+        parents[source] = source
+
+        frontier = array("i", [source])
+        while frontier:
+            self.num_explored += len(frontier)
+            if len(frontier) < THRESHOLD:
+                results = [expand((frontier, target))]
+            else:
+                size = -(-len(frontier) // (self.processes * CHUNKS))
+                chunks = [(frontier[i:i + size], target)
+                          for i in range(0, len(frontier), size)]
+                results = self.pool.map(expand, chunks)
+
+            # Merge in chunk order, so the first chunk to reach a person
+            # is its parent, just as in a serial search
+            next_frontier = array("i")
+            for stars, parent_people, movies, walked in results:
+                for movie in walked:
+                    seen_movies[movie] = 1
+                for star, person, movie in zip(stars, parent_people, movies):
+                    if visited[star]:
+                        continue
+                    visited[star] = 1
+                    parents[star] = person
+                    via[star] = movie
+                    next_frontier.append(star)
+
+            if visited[target]:
+                path = []
+                person = target
+                while person != source:
+                    path.append((via[person], person))
+                    person = parents[person]
+                path.reverse()
+                return path
+            frontier = next_frontier
+        return None
+
+
+def attach(directory, shared_visited, shared_seen_movies, loaded=None):
+    """
+    Map the snapshot graph and shared search state into this process.
+    """
+    global graph, visited, seen_movies
+    graph = loaded if loaded is not None else snapshot.load(directory)[3]
+    visited = memoryview(shared_visited).cast("B")
+    seen_movies = memoryview(shared_seen_movies).cast("B")
+
+
+def expand(task):
+    """
+    Takes a tuple of a frontier chunk and the target.
+    Returns the people first reached from the chunk as parallel
+    arrays of people, their parents and connecting movies, plus an
+    array of the movies walked to reach them, stopping early if the
+    target is reached.
+    """
+    frontier, target = task
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    stars = array("i")
+    parents = array("i")
+    movies = array("i")
+    walked = array("i")
+    reached = set()
+    walked_here = set()
+    for person in frontier:
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            if seen_movies[movie] or movie in walked_here:
+                continue
+            walked_here.add(movie)
+            walked.append(movie)
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                star = movie_stars[j]
+                if visited[star] or star in reached:
+                    continue
+                reached.add(star)
+                stars.append(star)
+                parents.append(person)
+                movies.append(movie)
+                if star == target:
+                    return stars, parents, movies, walked
+    return stars, parents, movies, walked
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python parallel.py directory [processes] [pairs]")
+    directory = sys.argv[1]
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    pairs = int(sys.argv[3]) if len(sys.argv) > 3 else PAIRS
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    search = ParallelSearch(directory, processes)
+    print("Data loaded.")
+
+    random.seed(SEED)
+    people = len(degrees.graph.person_ids)
+    queries = [(random.randrange(people), random.randrange(people))
+               for _ in range(pairs)]
+
+    serial = parallel = 0
+    for source, target in queries:
+        start = time.perf_counter()
+        expected = degrees.graph.shortest_path(source, target)
+        serial += time.perf_counter() - start
+
+        start = time.perf_counter()
+        path = search.shortest_path(source, target)
+        parallel += time.perf_counter() - start
+
+        if (path is None) != (expected is None) or (
+            path is not None and len(path) != len(expected)
+        ):
+            raise Exception(f"searches disagree on {source} to {target}")
+    search.close()
+
+    print(f"{pairs} random pairs from {directory}")
+    print(f"  Serial BFS: {serial:.3f}s")
+    print(f"  Parallel BFS ({processes} processes): {parallel:.3f}s")
+    print(f"  Speedup: {serial / parallel:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import functools
+import json
+import threading
+import time
+import traceback
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+PORT = 8050
+
+# Number of recent shortest paths kept for repeated queries
+CACHE_SIZE = 4096
+
+# Number of recent latencies per endpoint that metrics summarize
+WINDOW = 1000
+
+# Endpoints metrics are kept for, and the one key every other
+# path is counted under, so that unknown paths cannot add keys
+ENDPOINTS = ["/person", "/path", "/metrics"]
+OTHER = "other"
+
+
+class Metrics():
+    """
+    Thread-safe request and server error counts and recent latencies
+    per endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.errors = {}
+        self.latencies = {}
+
+    def record(self, endpoint, seconds, status):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            if status >= 500:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            if endpoint not in self.latencies:
+                self.latencies[endpoint] = deque(maxlen=WINDOW)
+            self.latencies[endpoint].append(seconds)
+
+    def summary(self):
+        """
+        Returns a dictionary of the request and server error counts and
+        the mean, median, 95th percentile and maximum recent latency in
+        milliseconds of each endpoint.
+        """
+        with self.lock:
+            summary = {}
+            for endpoint, latencies in self.latencies.items():
+                ordered = sorted(latencies)
+                summary[endpoint] = {
+                    "requests": self.counts[endpoint],
+                    "errors": self.errors.get(endpoint, 0),
+                    "mean_ms": 1000 * sum(ordered) / len(ordered),
+                    "p50_ms": 1000 * ordered[len(ordered) // 2],
+                    "p95_ms": 1000 * ordered[int(len(ordered) * 0.95)],
+                    "max_ms": 1000 * ordered[-1]
+                }
+            return summary
+
+
+metrics = Metrics()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_path(source, target):
+    """
+    Returns the shortest path between two person_ids as a tuple,
+    remembering recent answers.
+    """
+    path = degrees.shortest_path(source, target)
+    return None if path is None else tuple(path)
+
+
+def find_person(name):
+    """
+    Returns every person with a name, without prompting.
+    """
+    people = []
+    for person_id in sorted(degrees.names.get(name.lower(), set())):
+        person = degrees.people[person_id]
+        people.append({"id": person_id, "name": person["name"],
+                       "birth": person["birth"]})
+    return people
+
+
+def find_path(source, target):
+    """
+    Returns the degrees of separation and path between two person_ids.
+    """
+    for person_id in [source, target]:
+        if person_id not in degrees.people:
+            raise KeyError(person_id)
+    path = cached_path(source, target)
+    if path is None:
+        return {"source": source, "target": target, "degrees": None}
+    return {
+        "source": source,
+        "target": target,
+        "degrees": len(path),
+        "path": [{"movie_id": movie_id, "person_id": person_id}
+                 for movie_id, person_id in path]
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers GET /person?name=NAME, GET /path?source=ID&target=ID
+    and GET /metrics with JSON.
+    """
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/person":
+                status, body = 200, find_person(query["name"])
+            elif url.path == "/path":
+                status, body = 200, find_path(query["source"], query["target"])
+            elif url.path == "/metrics":
+                info = cached_path.cache_info()
+                status, body = 200, {
+                    "endpoints": metrics.summary(),
+                    "cache": {"hits": info.hits, "misses": info.misses,
+                              "size": info.currsize}
+                }
+            else:
+                status, body = 404, {"error": "not found"}
+        except KeyError as e:
+            status, body = 400, {"error": f"unknown or missing {e}"}
+        except Exception:
+            traceback.print_exc()
+            status, body = 500, {"error": "internal error"}
+        try:
+            self.reply(status, body)
+        finally:
+            endpoint = url.path if url.path in ENDPOINTS else OTHER
+            metrics.record(endpoint, time.perf_counter() - start, status)
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load a compact graph and snapshot it")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, args.compact)
+    print("Data loaded.")
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Serving on http://127.0.0.1:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
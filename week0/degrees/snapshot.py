@@ -0,0 +1,335 @@
+import json
+import mmap
+import os
+import struct
+
+from array import array
+from collections.abc import Mapping, Sequence
+
+from graph import StarGraph
+from lookup import NameLookup, Postings
+
+MAGIC = b"DEGREES\0"
+VERSION = 3
+FILENAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Arrays of the star graph stored in every snapshot
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+
+
+class StringTable():
+    """
+    Immutable sequence of strings stored as one UTF-8 buffer and an
+    array of offsets, so that it can be memory-mapped from a snapshot.
+
+    If built with a sort key, `order` lists the positions of the strings
+    sorted by that key and `search` finds them by binary search.
+    """
+
+    def __init__(self, data, offsets, order=None, fold=False):
+        self.data = data
+        self.offsets = offsets
+        self.order = order
+        self.fold = fold
+
+    @classmethod
+    def build(cls, strings, ordered=False, fold=False):
+        """
+        Build a table from a list of strings, optionally indexed by
+        the strings themselves (or their lowercase form, if `fold`).
+        """
+        data = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        order = None
+        if ordered:
+            key = (lambda i: strings[i].lower()) if fold else strings.__getitem__
+            order = array("i", sorted(range(len(strings)), key=key))
+        return cls(bytes(data), offsets, order, fold)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def key(self, i):
+        return self[i].lower() if self.fold else self[i]
+
+    def search(self, string):
+        """
+        Returns the positions of every string whose key equals `string`.
+        """
+        order = self.order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(order[middle]) < string:
+                low = middle + 1
+            else:
+                high = middle
+        matches = []
+        while low < len(order) and self.key(order[low]) == string:
+            matches.append(order[low])
+            low += 1
+        return matches
+
+
+class TableIndex(Mapping):
+    """
+    Maps each string of a unique, ordered `StringTable` to its position.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, string):
+        matches = self.table.search(string)
+        if not matches:
+            raise KeyError(string)
+        return matches[0]
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+class Records(Mapping):
+    """
+    Read-only view mapping ids to dictionaries of fields,
+    such as the `people` and `movies` dictionaries of degrees.py.
+    """
+
+    def __init__(self, ids, fields):
+        self.ids = ids
+        self.index = TableIndex(ids)
+        self.fields = fields
+
+    def __getitem__(self, id):
+        i = self.index[id]
+        return {field: table[i] for field, table in self.fields.items()}
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class NameIndex(Mapping):
+    """
+    Read-only view mapping lowercase names to sets of person_ids,
+    like the `names` dictionary of degrees.py.
+    """
+
+    def __init__(self, names, person_ids):
+        self.names = names
+        self.person_ids = person_ids
+
+    def __getitem__(self, name):
+        matches = self.names.search(name)
+        if not matches:
+            raise KeyError(name)
+        return {self.person_ids[i] for i in matches}
+
+    def __iter__(self):
+        previous = None
+        for i in self.names.order:
+            name = self.names.key(i)
+            if name != previous:
+                yield name
+            previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Ordered(Sequence):
+    """
+    Read-only view of the strings of an ordered `StringTable` in sorted
+    order, by their key, or of the strings of another table of the same
+    length in that order.
+    """
+
+    def __init__(self, table, strings=None):
+        self.table = table
+        self.strings = strings
+
+    def __getitem__(self, i):
+        if self.strings is None:
+            return self.table.key(self.table.order[i])
+        return self.strings[self.table.order[i]]
+
+    def __len__(self):
+        return len(self.table)
+
+
+def signature(directory):
+    """
+    Returns the modification time and size of each source CSV.
+    """
+    sources = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        sources[filename] = [stat.st_mtime_ns, stat.st_size]
+    return sources
+
+
+def save(directory, people, movies, graph):
+    """
+    Write a snapshot of loaded `people`, `movies` and compact `graph`
+    into `directory`, replacing any previous snapshot.
+    Returns the `NameLookup` of people stored in the snapshot.
+    """
+    person_ids = list(people)
+    movie_ids = list(movies)
+    tables = {
+        "person_ids": StringTable.build(person_ids, ordered=True),
+        "person_names": StringTable.build(
+            [people[id]["name"] for id in person_ids], ordered=True, fold=True
+        ),
+        "person_births": StringTable.build(
+            [people[id]["birth"] for id in person_ids]
+        ),
+        "movie_ids": StringTable.build(movie_ids, ordered=True),
+        "movie_titles": StringTable.build(
+            [movies[id]["title"] for id in movie_ids]
+        ),
+        "movie_years": StringTable.build(
+            [movies[id]["year"] for id in movie_ids]
+        )
+    }
+
+    # Index names in the order of the table of names, which the
+    # lookup can then read from the snapshot in place
+    names = tables["person_names"]
+    counts = array("i")
+    for i in names.order:
+        person = graph.person_index[person_ids[i]]
+        counts.append(graph.person_offsets[person + 1]
+                      - graph.person_offsets[person])
+    lookup = NameLookup([names.key(i) for i in names.order],
+                        [person_ids[i] for i in names.order], counts)
+
+    sections = []
+    for name in ARRAYS:
+        sections.append((name, getattr(graph, name)))
+    sections.append(("lookup.movie_counts", lookup.movie_counts))
+    sections.append(("lookup.tree", lookup.tree))
+    sections.append(("lookup.entries", lookup.postings.entries))
+    sections.append(("lookup.buckets", lookup.postings.buckets))
+    for name, table in tables.items():
+        sections.append((f"{name}.data", table.data))
+        sections.append((f"{name}.offsets", table.offsets))
+        if table.order is not None:
+            sections.append((f"{name}.order", table.order))
+
+    # Lay sections out on 8 byte boundaries after the header
+    layout = {}
+    position = 0
+    for name, section in sections:
+        typecode = getattr(section, "typecode", "B")
+        size = len(memoryview(section).cast("B"))
+        layout[name] = [position, size, typecode]
+        position += size + (-size % 8)
+    header = json.dumps({
+        "version": VERSION,
+        "sources": signature(directory),
+        "sections": layout,
+        "fold": [name for name, table in tables.items() if table.fold]
+    }).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    path = os.path.join(directory, FILENAME)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<QQ", VERSION, len(header)))
+        f.write(header)
+        for name, section in sections:
+            raw = memoryview(section).cast("B")
+            f.write(raw)
+            f.write(b"\0" * (-len(raw) % 8))
+    os.replace(f"{path}.tmp", path)
+    return lookup
+
+
+def load(directory):
+    """
+    Memory-map the snapshot in `directory`.
+    Returns a tuple of `people`, `movies` and `names` views, the compact
+    graph and a `NameLookup` reading its arrays from the snapshot, or
+    None if there is no snapshot or it is out of date.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    prefix = len(MAGIC) + 16
+    if len(view) < prefix or view[:len(MAGIC)] != MAGIC:
+        return None
+    version, length = struct.unpack("<QQ", view[len(MAGIC):prefix])
+    if version != VERSION:
+        return None
+
+    # A truncated or corrupt snapshot is treated like a stale one
+    try:
+        header = json.loads(str(view[prefix:prefix + length], "utf-8"))
+        if header["sources"] != signature(directory):
+            return None
+
+        start = prefix + length
+        sections = {}
+        for name, (position, size, typecode) in header["sections"].items():
+            if position < 0 or size < 0 or start + position + size > len(view):
+                return None
+            section = view[start + position:start + position + size]
+            sections[name] = section.cast(typecode)
+
+        tables = {}
+        for name in ["person_ids", "person_names", "person_births",
+                     "movie_ids", "movie_titles", "movie_years"]:
+            tables[name] = StringTable(
+                sections[f"{name}.data"],
+                sections[f"{name}.offsets"],
+                sections.get(f"{name}.order"),
+                name in header["fold"]
+            )
+
+        graph = StarGraph.from_arrays(
+            tables["person_ids"], tables["movie_ids"],
+            TableIndex(tables["person_ids"]), TableIndex(tables["movie_ids"]),
+            *[sections[name] for name in ARRAYS]
+        )
+        lookup = NameLookup(
+            Ordered(tables["person_names"]),
+            Ordered(tables["person_names"], tables["person_ids"]),
+            sections["lookup.movie_counts"], sections["lookup.tree"],
+            Postings(sections["lookup.entries"], sections["lookup.buckets"])
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    graph.buffer = buffer
+
+    people = Records(tables["person_ids"], {
+        "name": tables["person_names"],
+        "birth": tables["person_births"]
+    })
+    movies = Records(tables["movie_ids"], {
+        "title": tables["movie_titles"],
+        "year": tables["movie_years"]
+    })
+    names = NameIndex(tables["person_names"], tables["person_ids"])
+    return people, movies, names, graph, lookup
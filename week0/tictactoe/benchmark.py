@@ -0,0 +1,195 @@
+import argparse
+import functools
+import json
+import random
+import subprocess
+import time
+
+import tictactoe as ttt
+
+GAMES = 1000
+SEED = 0
+OUTPUT = "benchmark.json"
+
+
+def random_player(board, generator):
+    """
+    Returns any legal action.
+    """
+    return generator.choice(sorted(ttt.actions(board)))
+
+
+def greedy_player(board, generator):
+    """
+    Returns a winning action if there is one, otherwise one that blocks
+    the opponent's win if there is one, otherwise any legal action.
+    """
+    actions = sorted(ttt.actions(board))
+    turn = ttt.player(board)
+    opponent = ttt.O if turn == ttt.X else ttt.X
+    for mark in [turn, opponent]:
+        for i, j in actions:
+            trial = [row.copy() for row in board]
+            trial[i][j] = mark
+            if ttt.winner(trial) == mark:
+                return (i, j)
+    return generator.choice(actions)
+
+
+@functools.lru_cache(maxsize=None)
+def solve(cells):
+    """
+    Returns the minimax value for X of a board given as a tuple of rows,
+    by exhaustive search independent of tictactoe.minimax.
+    """
+    board = [list(row) for row in cells]
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    values = [solve(freeze(ttt.result(board, action)))
+              for action in ttt.actions(board)]
+    return max(values) if ttt.player(board) == ttt.X else min(values)
+
+
+def freeze(board):
+    return tuple(tuple(row) for row in board)
+
+
+def perfect_player(board, generator):
+    """
+    Returns one of the optimal actions, chosen at random.
+    """
+    values = {action: solve(freeze(ttt.result(board, action)))
+              for action in sorted(ttt.actions(board))}
+    pick = max if ttt.player(board) == ttt.X else min
+    best = pick(values.values())
+    return generator.choice([a for a, v in values.items() if v == best])
+
+
+OPPONENTS = {
+    "random": random_player,
+    "greedy": greedy_player,
+    "perfect": perfect_player
+}
+
+
+def play(opponent, ai, generator):
+    """
+    Plays one game of minimax as `ai` against an opponent.
+    Returns the winner and lists of the seconds and nodes searched
+    for each of the AI's moves.
+    """
+    board = ttt.initial_state()
+    latencies = []
+    nodes = []
+    while not ttt.terminal(board):
+        if ttt.player(board) == ai:
+            start = time.perf_counter()
+            action = ttt.minimax(board)
+            latencies.append(time.perf_counter() - start)
+            nodes.append(ttt.stats["nodes"])
+        else:
+            action = opponent(board, generator)
+        board = ttt.result(board, action)
+    return ttt.winner(board), latencies, nodes
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, nodes):
+    """
+    Returns a dictionary describing move latencies in milliseconds
+    and nodes searched per move.
+    """
+    ordered = sorted(latencies)
+    return {
+        "moves": len(ordered),
+        "latency_ms": {
+            "mean": 1000 * sum(ordered) / len(ordered),
+            "p50": 1000 * percentile(ordered, 0.5),
+            "p95": 1000 * percentile(ordered, 0.95),
+            "p99": 1000 * percentile(ordered, 0.99),
+            "max": 1000 * ordered[-1]
+        },
+        "nodes": {
+            "mean": sum(nodes) / len(nodes),
+            "max": max(nodes),
+            "total": sum(nodes)
+        }
+    }
+
+
+def revision():
+    """
+    Returns the current git commit, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play minimax against scripted opponents."
+    )
+    parser.add_argument("games", nargs="?", type=int, default=GAMES,
+                        help="games per opponent, half as X and half as O")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", default=OUTPUT,
+                        help="file to write JSON results to")
+    parser.add_argument("--no-book", action="store_true",
+                        help="search every move instead of using book.py")
+    args = parser.parse_args()
+
+    if args.no_book:
+        ttt.openings = {}
+    generator = random.Random(args.seed)
+
+    results = {
+        "revision": revision(),
+        "games": args.games,
+        "seed": args.seed,
+        "book": not args.no_book,
+        "opponents": {}
+    }
+    for name, opponent in OPPONENTS.items():
+        outcomes = {"win": 0, "draw": 0, "loss": 0}
+        latencies = []
+        nodes = []
+        for game in range(args.games):
+            ai = ttt.X if game % 2 == 0 else ttt.O
+            winner, game_latencies, game_nodes = play(opponent, ai, generator)
+            if winner is None:
+                outcomes["draw"] += 1
+            elif winner == ai:
+                outcomes["win"] += 1
+            else:
+                outcomes["loss"] += 1
+            latencies.extend(game_latencies)
+            nodes.extend(game_nodes)
+
+        summary = summarize(latencies, nodes)
+        summary.update({
+            outcome: count / args.games for outcome, count in outcomes.items()
+        })
+        results["opponents"][name] = summary
+
+        latency = summary["latency_ms"]
+        print(f"vs {name}: {outcomes['win']} won, {outcomes['draw']} drawn, "
+              f"{outcomes['loss']} lost")
+        print(f"  {summary['moves']} moves, p50 {latency['p50']:.3f}ms, "
+              f"p95 {latency['p95']:.3f}ms, max {latency['max']:.3f}ms, "
+              f"{summary['nodes']['mean']:.1f} nodes per move")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
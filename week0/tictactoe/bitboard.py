@@ -0,0 +1,169 @@
+"""
+Tic Tac Toe bitboards
+
+A board is a tuple (x, o) of two 9-bit masks of the cells taken by
+each player, where cell (i, j) is bit 3 * i + j. The functions below
+are drop-in equivalents of those in tictactoe.py for such boards.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Masks of the three rows, three columns and two diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Cell orders of the eight rotations and reflections of the board
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],
+    [8, 5, 2, 7, 4, 1, 6, 3, 0]
+]
+
+
+def permute(mask, symmetry):
+    """
+    Returns the mask with its cells rearranged by a symmetry.
+    """
+    permuted = 0
+    for cell, source in enumerate(symmetry):
+        if mask >> source & 1:
+            permuted |= 1 << cell
+    return permuted
+
+
+# Every mask under every symmetry, so canonical keys need no bit loops
+PERMUTATIONS = [
+    [permute(mask, symmetry) for mask in range(FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = board
+    return X if bin(x).count("1") <= bin(o).count("1") else O
+
+
+def moves(board):
+    """
+    Returns the mask of empty cells on the board.
+    """
+    x, o = board
+    return FULL & ~(x | o)
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    empty = moves(board)
+    return {(cell // 3, cell % 3) for cell in range(9) if empty >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3) or not moves(board) >> (3 * i + j) & 1:
+        raise ValueError("Not a legal move")
+    return play(board, 1 << (3 * i + j))
+
+
+def play(board, bit):
+    """
+    Returns the board after the player to move takes the cell `bit`,
+    without checking that the move is legal.
+    """
+    x, o = board
+    if player(board) == X:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = board
+    for line in LINES:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return winner(board) is not None or moves(board) == 0
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    win = winner(board)
+    if win == X:
+        return 1
+    elif win == O:
+        return -1
+    return 0
+
+
+def canonical(board):
+    """
+    Returns the same integer key for a board and all of its rotations
+    and reflections.
+    """
+    x, o = board
+    return min(table[x] << 9 | table[o] for table in PERMUTATIONS)
+
+
+def from_board(board):
+    """
+    Returns the bitboard of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(board):
+    """
+    Returns the list-of-lists board of a bitboard.
+    """
+    x, o = board
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+         for j in range(3)]
+        for i in range(3)
+    ]
@@ -0,0 +1,215 @@
+"""
+Tic Tac Toe opening book
+
+Solves every position reachable from the empty board once, keeping one
+entry per position up to rotation and reflection, and stores each as
+a single packed integer:
+
+    canonical key << 8 | best cell << 4 | value + OFFSET
+
+where the best cell is in the orientation of the canonical key, or
+NO_MOVE once the game is over, and the value is the scaled minimax
+value for X that tictactoe.search returns.
+
+Usage: python book.py [--check]
+
+test_book.py runs the same check on a freshly solved book.
+"""
+
+import math
+import os
+import sys
+
+from array import array
+
+import bitboard
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "tictactoe.book")
+
+NO_MOVE = 15
+OFFSET = 8
+
+
+def orient(bits):
+    """
+    Returns the canonical key of a bitboard and the index of the
+    symmetry that maps the bitboard onto it.
+    """
+    x, o = bits
+    return min(
+        (table[x] << 9 | table[o], k)
+        for k, table in enumerate(bitboard.PERMUTATIONS)
+    )
+
+
+def solve():
+    """
+    Returns a dictionary mapping the canonical key of every reachable
+    position to its (best cell, value), found by exhaustive minimax.
+    """
+    solved = {}
+
+    def value(bits):
+        key, k = orient(bits)
+        if key in solved:
+            return solved[key][1]
+
+        empty = bitboard.moves(bits)
+        win = bitboard.utility(bits)
+        if win != 0 or empty == 0:
+            solved[key] = (NO_MOVE, win * (bin(empty).count("1") + 1))
+            return solved[key][1]
+
+        # Search the canonical orientation, so that the best cell
+        # is stored in the same frame as the key
+        x, o = bits
+        bits = (bitboard.PERMUTATIONS[k][x], bitboard.PERMUTATIONS[k][o])
+        maximizing = bitboard.player(bits) == bitboard.X
+        best = (None, -math.inf if maximizing else math.inf)
+        for cell in range(9):
+            if not bitboard.moves(bits) >> cell & 1:
+                continue
+            child = value(bitboard.play(bits, 1 << cell))
+            if (maximizing and child > best[1]) or (
+                not maximizing and child < best[1]
+            ):
+                best = (cell, child)
+        solved[key] = best
+        return best[1]
+
+    value(bitboard.initial_state())
+    return solved
+
+
+def save(solved, filename=FILENAME):
+    """
+    Writes a solved book to a file as sorted packed integers.
+    """
+    entries = array("I", sorted(
+        key << 8 | cell << 4 | value + OFFSET
+        for key, (cell, value) in solved.items()
+    ))
+    with open(filename, "wb") as f:
+        entries.tofile(f)
+
+
+def load(filename=FILENAME):
+    """
+    Returns a dictionary mapping canonical keys to (best cell, value)
+    read from a book file, or None if there is no book or it was cut
+    short partway through an entry.
+    """
+    entries = array("I")
+    try:
+        with open(filename, "rb") as f:
+            entries.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    return {
+        entry >> 8: (entry >> 4 & 0xF, (entry & 0xF) - OFFSET)
+        for entry in entries
+    }
+
+
+def opening(filename=FILENAME):
+    """
+    Returns the book read from a file, first solving it and writing the
+    file if there is no usable book, as in a fresh checkout.
+    """
+    book = load(filename)
+    if book is None:
+        book = solve()
+        try:
+            save(book, filename)
+        except OSError:
+            pass
+    return book
+
+
+def lookup(book, bits):
+    """
+    Returns the best action (i, j) and the value of a bitboard from a
+    book, with no action once the game is over, or None if the
+    position is not in the book.
+    """
+    key, k = orient(bits)
+    entry = book.get(key)
+    if entry is None:
+        return None
+    cell, value = entry
+    if cell == NO_MOVE:
+        return None, value
+
+    # Cell c of the canonical board is cell SYMMETRIES[k][c] of this one
+    cell = bitboard.SYMMETRIES[k][cell]
+    return (cell // 3, cell % 3), value
+
+
+def reachable():
+    """
+    Returns every bitboard reachable from the empty board.
+    """
+    seen = {bitboard.initial_state()}
+    stack = list(seen)
+    while stack:
+        bits = stack.pop()
+        if bitboard.terminal(bits):
+            continue
+        empty = bitboard.moves(bits)
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            child = bitboard.play(bits, bit)
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return seen
+
+
+def check(book):
+    """
+    Checks the value and best action of every reachable position in a
+    book against a live search. Returns the number of positions checked.
+    """
+    import tictactoe as ttt
+
+    positions = reachable()
+    for bits in positions:
+        ttt.table.clear()
+        action, value = lookup(book, bits)
+        expected = ttt.search(bits, -math.inf, math.inf)
+        if value != expected:
+            raise Exception(f"book value {value} for {bits}, "
+                            f"search says {expected}")
+        if action is None:
+            if not bitboard.terminal(bits):
+                raise Exception(f"book has no move for {bits}")
+            continue
+        ttt.table.clear()
+        child = ttt.search(bitboard.result(bits, action), -math.inf, math.inf)
+        if child != expected:
+            raise Exception(f"book move {action} for {bits} is worth "
+                            f"{child}, search says {expected}")
+    return len(positions)
+
+
+def main():
+    if len(sys.argv) > 2 or sys.argv[1:] not in [[], ["--check"]]:
+        sys.exit("Usage: python book.py [--check]")
+
+    if sys.argv[1:] == ["--check"]:
+        book = load()
+        if book is None:
+            sys.exit(f"No book at {FILENAME}, run python book.py first")
+        print(f"Checked {check(book)} positions against search.")
+        return
+
+    solved = solve()
+    save(solved)
+    print(f"Wrote {len(solved)} positions to {FILENAME} "
+          f"({os.path.getsize(FILENAME)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
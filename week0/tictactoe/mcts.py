@@ -0,0 +1,211 @@
+"""
+Monte Carlo tree search player
+
+Plays any game with the functions of tictactoe.py, including an
+mnk.MNKGame, by upper confidence bound tree search (UCT): each
+iteration walks down the tree to a leaf, adds one child, plays a batch
+of random games from it and counts their results back up the tree.
+
+Usage: python mcts.py [games] [rows columns k]
+"""
+
+import math
+import random
+import sys
+import time
+
+import mnk
+import tictactoe
+
+# Random games played from each new node
+BATCH = 8
+
+# Weight of exploring rarely visited moves against exploiting good ones
+EXPLORATION = math.sqrt(2)
+
+# Iteration counts compared by main
+ITERATIONS = [10, 30, 100, 300, 1000]
+GAMES = 20
+
+
+class Node():
+    """
+    A position in the search tree, with the total score of the random
+    games through it, from the view of the player who moved into it.
+    """
+
+    def __init__(self, game, board, parent=None, action=None):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = []
+        if not game.terminal(board):
+            self.untried = sorted(game.actions(board))
+        self.mover = None if parent is None else game.player(parent.board)
+        self.visits = 0
+        self.score = 0
+
+    def select(self, exploration):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.score / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)
+        ))
+
+
+class MCTS():
+    """
+    Anytime player that searches for a number of iterations or until
+    a time budget runs out, whichever comes first, but always for at
+    least one iteration.
+    """
+
+    def __init__(self, game=tictactoe, iterations=1000, budget=None,
+                 batch=BATCH, exploration=EXPLORATION, seed=None):
+        if iterations is None and budget is None:
+            raise Exception("MCTS needs an iteration count or a time budget")
+        self.game = game
+        self.iterations = iterations
+        self.budget = budget
+        self.batch = batch
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.stats = {"iterations": 0, "rollouts": 0}
+
+    def minimax(self, board):
+        """
+        Returns the most visited action for the current player
+        on the board, or None if the game is over. Named like the
+        function of tictactoe.py so the two can be swapped.
+        """
+        game = self.game
+        if game.terminal(board):
+            return None
+
+        root = Node(game, board)
+        deadline = math.inf if self.budget is None else (
+            time.perf_counter() + self.budget
+        )
+        # Always run one iteration, so that the root has a child to
+        # choose even if the budget runs out before the first
+        iterations = 0
+        while iterations == 0 or (
+            (self.iterations is None or iterations < self.iterations)
+            and time.perf_counter() < deadline
+        ):
+            iterations += 1
+
+            # Select down to a node with moves not yet in the tree
+            node = root
+            while not node.untried and node.children:
+                node = node.select(self.exploration)
+
+            # Expand one of them
+            if node.untried:
+                action = node.untried.pop(
+                    self.random.randrange(len(node.untried))
+                )
+                child = Node(game, game.result(node.board, action),
+                             node, action)
+                node.children.append(child)
+                node = child
+
+            # Play a batch of random games and count their results up
+            # the tree: 1 for a win, a half for a tie
+            wins = {game.X: 0, game.O: 0}
+            for _ in range(self.batch):
+                winner = self.rollout(node.board)
+                if winner is None:
+                    wins[game.X] += 0.5
+                    wins[game.O] += 0.5
+                else:
+                    wins[winner] += 1
+            while node is not None:
+                node.visits += self.batch
+                if node.mover is not None:
+                    node.score += wins[node.mover]
+                node = node.parent
+
+        self.stats = {"iterations": iterations,
+                      "rollouts": iterations * self.batch}
+        return max(root.children, key=lambda child: child.visits).action
+
+    def rollout(self, board):
+        """
+        Returns the winner of a game played on from the board
+        with random moves, or None for a tie.
+        """
+        # Playing the empty cells in a random order is a random game,
+        # without listing the actions again after every move
+        game = self.game
+        actions = sorted(game.actions(board))
+        self.random.shuffle(actions)
+        for action in actions:
+            winner = game.winner(board)
+            if winner is not None:
+                return winner
+            board = game.result(board, action)
+        return game.winner(board)
+
+
+def play(game, first, second):
+    """
+    Plays a game between two functions from a board to an action.
+    Returns the winner.
+    """
+    board = game.initial_state()
+    players = {game.X: first, game.O: second}
+    while not game.terminal(board):
+        board = game.result(board, players[game.player(board)](board))
+    return game.winner(board)
+
+
+def main():
+    if len(sys.argv) not in [1, 2, 5]:
+        sys.exit("Usage: python mcts.py [games] [rows columns k]")
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else GAMES
+    if len(sys.argv) == 5:
+        game = mnk.MNKGame(*(int(arg) for arg in sys.argv[2:]))
+        name = "{}x{}, {} in a row".format(*sys.argv[2:])
+    else:
+        game = tictactoe
+        name = "tic-tac-toe"
+
+    generator = random.Random(0)
+
+    def random_player(board):
+        return generator.choice(sorted(game.actions(board)))
+
+    opponents = {"random": random_player, "minimax": game.minimax}
+
+    print(f"MCTS playing {name}, {games} games per opponent, "
+          f"half as X and half as O")
+    for iterations in ITERATIONS:
+        player = MCTS(game, iterations, seed=iterations)
+        for opponent_name, opponent in opponents.items():
+            outcomes = {"won": 0, "drawn": 0, "lost": 0}
+            start = time.perf_counter()
+            for i in range(games):
+                side = game.X if i % 2 == 0 else game.O
+                if side == game.X:
+                    winner = play(game, player.minimax, opponent)
+                else:
+                    winner = play(game, opponent, player.minimax)
+                if winner is None:
+                    outcomes["drawn"] += 1
+                elif winner == side:
+                    outcomes["won"] += 1
+                else:
+                    outcomes["lost"] += 1
+            elapsed = time.perf_counter() - start
+            print(f"  {iterations:5} iterations vs {opponent_name}: "
+                  f"{outcomes['won']} won, {outcomes['drawn']} drawn, "
+                  f"{outcomes['lost']} lost ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+m,n,k-game Player
+
+Tic Tac Toe on a board of any number of rows and columns, won by
+the first player to get k marks in a row. An MNKGame has the same
+functions as tictactoe.py, so runner.py can play either.
+"""
+
+import math
+import random
+import threading
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds minimax may spend choosing a move
+BUDGET = 0.4
+
+# Value of a win, plus one for every cell still empty after it,
+# which is more than any evaluation of an undecided board
+WIN = 10 ** 9
+
+# Nodes searched between checks of the clock and the stop event
+CHECK = 256
+
+# Transposition table entries kept before the table is cleared
+MAX_ENTRIES = 1000000
+
+# Kinds of values stored in the transposition table
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# Steps to the next cell along a row, a column and both diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class OutOfTime(Exception):
+    """
+    Raised inside a search once its time budget is used up
+    or it is asked to stop.
+    """
+
+
+class MNKGame():
+    """
+    An m,n,k-game with an iterative deepening alpha-beta player.
+
+    The search works on a flat list of cells and only checks for a win
+    along the lines through each move as it is made. Positions are
+    keyed by Zobrist hashes in a transposition table that is kept from
+    move to move, and moves are tried best known first: the table's
+    best move, then moves that caused cutoffs before, then central ones.
+    """
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, rows=3, columns=3, k=3, budget=BUDGET, seed=0):
+        if not 1 <= k <= max(rows, columns):
+            raise Exception(f"cannot get {k} in a row on a "
+                            f"{rows}x{columns} board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.budget = budget
+
+        # Every k cells in a row, as flat indexes
+        self.windows = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.windows.append(tuple(
+                            (i + step * di) * columns + j + step * dj
+                            for step in range(k)
+                        ))
+
+        # Weight of a window holding some marks of only one player
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # Closeness of each cell to the center, used to order moves
+        self.centrality = [
+            -abs(i - (rows - 1) / 2) - abs(j - (columns - 1) / 2)
+            for i in range(rows) for j in range(columns)
+        ]
+
+        generator = random.Random(seed)
+        self.keys = [
+            {X: generator.getrandbits(64), O: generator.getrandbits(64)}
+            for _ in range(rows * columns)
+        ]
+
+        self.table = {}
+        self.history = {}
+        self.deadline = math.inf
+        self.stats = {"nodes": 0, "depth": 0}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.columns for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        cells = [cell for row in board for cell in row]
+        return X if cells.count(X) <= cells.count(O) else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j) for i in range(self.rows) for j in range(self.columns)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns) or (
+            board[i][j] != EMPTY
+        ):
+            raise ValueError("Not a legal move")
+        result_board = [row.copy() for row in board]
+        result_board[i][j] = self.player(board)
+        return result_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first != EMPTY and all(cells[i] == first for i in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or not any(
+            cell == EMPTY for row in board for cell in row
+        )
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        win = self.winner(board)
+        if win == X:
+            return 1
+        elif win == O:
+            return -1
+        return 0
+
+    def minimax(self, board, stop=None):
+        """
+        Returns the best action for the current player on the board that
+        can be found within the time budget, or before `stop`, a
+        threading.Event of this search alone, is set from another thread.
+        """
+        if self.terminal(board):
+            return None
+
+        cells = [cell for row in board for cell in row]
+        turn = self.player(board)
+        empty = cells.count(EMPTY)
+        key = 0
+        for index, cell in enumerate(cells):
+            if cell != EMPTY:
+                key ^= self.keys[index][cell]
+
+        if len(self.table) > MAX_ENTRIES:
+            self.table.clear()
+        self.stats = {"nodes": 0, "depth": 0}
+        self.deadline = time.perf_counter() + self.budget
+        if stop is None:
+            stop = threading.Event()
+
+        # Search one move deeper each time, keeping the move of the
+        # deepest search to finish before the deadline
+        best = self.ordered(cells, None)[0]
+        for depth in range(1, empty + 1):
+            try:
+                value = self.search(cells, key, turn, depth,
+                                    -math.inf, math.inf, empty, stop)
+            except OutOfTime:
+                break
+            best = self.table[key][3]
+            self.stats["depth"] = depth
+            if abs(value) >= WIN:
+                break
+        return divmod(best, self.columns)
+
+    def search(self, cells, key, turn, depth, alpha, beta, empty, stop):
+        """
+        Returns the value of the cells for the player `turn` within the
+        window (alpha, beta), searching `depth` moves ahead and
+        evaluating the board beyond that, unless `stop` is set first.
+        """
+        self.stats["nodes"] += 1
+        if self.stats["nodes"] % CHECK == 0 and (
+            stop.is_set() or time.perf_counter() > self.deadline
+        ):
+            raise OutOfTime()
+
+        best = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, value, flag, best = entry
+            if entry_depth >= depth and (
+                flag == EXACT or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)
+            ):
+                return value
+
+        if depth == 0:
+            return self.evaluate(cells, turn)
+
+        original_alpha = alpha
+        opponent = O if turn == X else X
+        value = -math.inf
+        for move in self.ordered(cells, best):
+            cells[move] = turn
+            try:
+                if self.wins_at(cells, move):
+                    child = WIN + empty - 1
+                elif empty == 1:
+                    child = 0
+                else:
+                    child = -self.search(
+                        cells, key ^ self.keys[move][turn], opponent,
+                        depth - 1, -beta, -alpha, empty - 1, stop
+                    )
+            finally:
+                cells[move] = EMPTY
+            if child > value:
+                value, best = child, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self.history[move] = self.history.get(move, 0) + depth * depth
+                break
+
+        if value <= original_alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, value, flag, best)
+        return value
+
+    def ordered(self, cells, best):
+        """
+        Returns the empty cells, starting with `best`, then those that
+        caused the most cutoffs, then those nearest the center.
+        """
+        moves = [index for index, cell in enumerate(cells) if cell == EMPTY]
+        moves.sort(key=lambda move: (
+            move != best, -self.history.get(move, 0), -self.centrality[move]
+        ))
+        return moves
+
+    def wins_at(self, cells, index):
+        """
+        Returns True if the mark at index is part of k in a row.
+        """
+        mark = cells[index]
+        i, j = divmod(index, self.columns)
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in [1, -1]:
+                ni, nj = i + sign * di, j + sign * dj
+                while (0 <= ni < self.rows and 0 <= nj < self.columns
+                       and cells[ni * self.columns + nj] == mark):
+                    count += 1
+                    ni, nj = ni + sign * di, nj + sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def evaluate(self, cells, turn):
+        """
+        Returns an estimate of the value of undecided cells for the
+        player `turn`, from the windows that only one player has
+        marks in, weighted by how many marks they hold.
+        """
+        score = 0
+        for window in self.windows:
+            mine = theirs = 0
+            for index in window:
+                cell = cells[index]
+                if cell == turn:
+                    mine += 1
+                elif cell != EMPTY:
+                    theirs += 1
+            if not theirs:
+                score += self.weights[mine]
+            elif not mine:
+                score -= self.weights[theirs]
+        return score
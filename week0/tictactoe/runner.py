@@ -1,8 +1,37 @@
+import argparse
 import pygame
 import sys
+import threading
 import time
 
-import tictactoe as ttt
+from concurrent.futures import ThreadPoolExecutor
+
+import mnk
+import tictactoe
+
+# Frames drawn per second, including while the computer is thinking
+FPS = 60
+
+# Seconds the computer appears to think before its move is shown
+DELAY = 0.5
+
+# Board size and win length from the command line, 3 3 3 by default
+parser = argparse.ArgumentParser()
+parser.add_argument("game", nargs="*", type=int, metavar="rows columns k")
+parser.add_argument("--budget", type=float, default=mnk.BUDGET,
+                    help="seconds the computer may search for a move")
+args = parser.parse_args()
+if len(args.game) not in [0, 3]:
+    parser.error("give the rows, columns and k of the game, or nothing")
+rows, columns, k = args.game or (3, 3, 3)
+if (rows, columns, k) == (3, 3, 3):
+    ttt = tictactoe
+else:
+    ttt = mnk.MNKGame(rows, columns, k, args.budget)
+
+# The computer's moves are searched on a worker thread, so the board
+# keeps drawing and handling events while a search runs
+executor = ThreadPoolExecutor(max_workers=1)
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,16 +44,35 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+tile_size = min(80, 280 // max(rows, columns))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", 3 * tile_size // 4)
+
+clock = pygame.time.Clock()
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_move = None
+ai_start = None
+
+# Event asking the search of ai_move, and only that search, to stop
+ai_stop = None
+
+
+def cancel(future, stop):
+    """
+    Stops a pending or running search, whose move is then ignored.
+    """
+    if future is not None:
+        future.cancel()
+        stop.set()
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel(ai_move, ai_stop)
+            executor.shutdown(wait=False)
             sys.exit()
 
     screen.fill(black)
@@ -33,7 +81,10 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        title = largeFont.render(
+            "Play Tic-Tac-Toe" if ttt is tictactoe
+            else f"Play {rows}x{columns}, {k} in a row", True, white
+        )
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
@@ -67,13 +118,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -102,28 +152,41 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            spinner = "|/-\\"[int(4 * time.time()) % 4]
+            title = f"Computer thinking {spinner}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, started on the worker thread and shown once
+        # it is found and the computer has appeared to think for a while
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if ai_move is None:
+                ai_stop = threading.Event()
+                if isinstance(ttt, mnk.MNKGame):
+                    ai_move = executor.submit(ttt.minimax, board, ai_stop)
+                else:
+                    ai_move = executor.submit(ttt.minimax, board)
+                ai_start = time.time()
+            elif ai_move.done() and time.time() - ai_start >= DELAY:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
             else:
-                ai_turn = True
+                # Show how much of the time budget the search has used
+                elapsed = time.time() - ai_start
+                used = min(1, elapsed / max(args.budget, DELAY))
+                progress = pygame.Rect(width / 4, height - 25, width / 2, 6)
+                pygame.draw.rect(screen, white, progress, 1)
+                progress.width = int(progress.width * used)
+                pygame.draw.rect(screen, white, progress)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -139,8 +202,10 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel(ai_move, ai_stop)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_move = None
 
     pygame.display.flip()
+    clock.tick(FPS)
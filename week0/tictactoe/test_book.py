@@ -0,0 +1,68 @@
+"""
+Checks the opening book of book.py against live search.
+
+Usage: python -m pytest test_book.py (or python test_book.py)
+"""
+
+import math
+import os
+import tempfile
+import unittest
+
+import bitboard
+import book
+import tictactoe as ttt
+
+
+class TestBook(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Solve a fresh book rather than trust whatever file is on disk
+        cls.book = book.solve()
+
+    def setUp(self):
+        self.openings = ttt.openings
+        ttt.openings = self.book
+
+    def tearDown(self):
+        ttt.openings = self.openings
+
+    def test_check(self):
+        self.assertEqual(book.check(self.book), len(book.reachable()))
+
+    def test_minimax(self):
+        for bits in book.reachable():
+            board = bitboard.to_board(bits)
+            action = ttt.minimax(board)
+            if bitboard.terminal(bits):
+                self.assertIsNone(action)
+                continue
+
+            # The book's move must be worth what searching every move is
+            ttt.table.clear()
+            expected = ttt.search(bits, -math.inf, math.inf)
+            ttt.table.clear()
+            value = ttt.search(bitboard.result(bits, action),
+                               -math.inf, math.inf)
+            self.assertEqual(value, expected, board)
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "tictactoe.book")
+            book.save(self.book, filename)
+            self.assertEqual(book.load(filename), self.book)
+
+    def test_truncated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "tictactoe.book")
+            book.save(self.book, filename)
+            with open(filename, "r+b") as f:
+                f.truncate(os.path.getsize(filename) - 1)
+            self.assertIsNone(book.load(filename))
+            self.assertEqual(book.opening(filename), self.book)
+            self.assertEqual(book.load(filename), self.book)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,30 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+
+import bitboard
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Kinds of values stored in the transposition table
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# Maps canonical board keys to (value, kind of value)
+table = {}
+
+# Nodes searched and transposition table lookups and hits
+# during the last call to minimax
+stats = {"nodes": 0, "lookups": 0, "hits": 0}
+
+# Solved positions from book.py, read, or solved if there is no book,
+# on the first call to minimax
+openings = None
+
 
 def initial_state():
     """
@@ -59,7 +77,7 @@ def result(board, action):
     if action not in possible_moves:
         raise ValueError("Not a legal move")
     else:
-        result_board = copy.deepcopy(board)
+        result_board = [row.copy() for row in board]
         result_board[action[0]][action[1]] = turn
     
     return result_board
@@ -111,13 +129,11 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if terminal(board) == True:
-        if winner(board) == X:
-            return 1
-        elif winner(board) == O:
-            return -1
-        else:
-            return 0
+    win = winner(board)
+    if win == X:
+        return 1
+    elif win == O:
+        return -1
     else:
         return 0
 
@@ -125,17 +141,87 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
+    if terminal(board):
+        return None
+
+    global openings
+    if openings is None:
+        openings = book.opening()
+
+    stats["nodes"] = stats["lookups"] = stats["hits"] = 0
+    bits = bitboard.from_board(board)
+    entry = book.lookup(openings, bits)
+    if entry is not None:
+        return entry[0]
+
     turn = player(board)
-    action_utility = {}
-    
-    
-    for action in actions(board):
-        print(action)
-        new_state = result(board,action)
-        u_new_state = utility(new_state)
-        action_utility[action] = u_new_state  
-    
-    if turn == X:
-        return max(action_utility.items(), key=lambda k: k[1])[0]
-    else: 
-        return min(action_utility.items(), key=lambda k: k[1])[0]
+    alpha, beta = -math.inf, math.inf
+    best_action = None
+
+    for action in sorted(actions(board)):
+        value = search(bitboard.result(bits, action), alpha, beta)
+        if turn == X and value > alpha:
+            alpha, best_action = value, action
+        elif turn == O and value < beta:
+            beta, best_action = value, action
+    return best_action
+
+def search(bits, alpha, beta):
+    """
+    Returns the minimax value of the bitboard for X within the window
+    (alpha, beta), scaled by how early the game is decided so that
+    faster wins and slower losses are preferred.
+
+    Values are cached in the transposition table under the board's
+    canonical key, along with whether they are exact or only a bound.
+    """
+    stats["nodes"] += 1
+    key = bitboard.canonical(bits)
+    stats["lookups"] += 1
+    entry = table.get(key)
+    if entry is not None:
+        value, flag = entry
+        if (flag == EXACT or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)):
+            stats["hits"] += 1
+            return value
+
+    empty = bitboard.moves(bits)
+    win = bitboard.utility(bits)
+    if win != 0 or empty == 0:
+        value = win * (bin(empty).count("1") + 1)
+        table[key] = (value, EXACT)
+        return value
+
+    original_alpha, original_beta = alpha, beta
+    maximizing = bitboard.player(bits) == X
+    value = -math.inf if maximizing else math.inf
+    while empty:
+        bit = empty & -empty
+        empty ^= bit
+        child = search(bitboard.play(bits, bit), alpha, beta)
+        if maximizing:
+            value = max(value, child)
+            alpha = max(alpha, value)
+        else:
+            value = min(value, child)
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+
+    if value <= original_alpha:
+        table[key] = (value, UPPER)
+    elif value >= original_beta:
+        table[key] = (value, LOWER)
+    else:
+        table[key] = (value, EXACT)
+    return value
+
+def hit_rate():
+    """
+    Returns the fraction of transposition table lookups during
+    the last call to minimax that answered without searching.
+    """
+    if stats["lookups"] == 0:
+        return 0
+    return stats["hits"] / stats["lookups"]
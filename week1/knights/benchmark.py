@@ -0,0 +1,127 @@
+import argparse
+import json
+import subprocess
+import time
+
+from generator import generate, knave, knight
+import inference
+from logic import model_check
+import parallel
+from sat import KnowledgeBase
+import truthtable
+
+SIZES = [2, 4, 6, 8, 10, 12, 16, 32, 64, 128]
+PUZZLES = 3
+SEED = 0
+OUTPUT = "benchmark.json"
+
+
+def enumerate_models(knowledge, queries):
+    return [model_check(knowledge, query) for query in queries]
+
+
+def truth_tables(knowledge, queries):
+    return [truthtable.model_check(knowledge, query) for query in queries]
+
+
+def processes(knowledge, queries):
+    return [parallel.model_check(knowledge, query) for query in queries]
+
+
+def forward_chaining(knowledge, queries):
+    clauses = inference.KnowledgeBase(knowledge)
+    return [clauses.entails(query) for query in queries]
+
+
+def knowledge_base(knowledge, queries):
+    compiled = KnowledgeBase(knowledge)
+    return [compiled.entails(query) for query in queries]
+
+
+# Each backend, and the most symbols it is given, since the model
+# checkers take time exponential in the number of symbols
+BACKENDS = {
+    "model_check": (enumerate_models, 16),
+    "truthtable": (truth_tables, 24),
+    "parallel": (processes, 24),
+    "inference": (forward_chaining, None),
+    "sat": (knowledge_base, None)
+}
+
+
+def queries(solution):
+    """
+    Returns every symbol of a puzzle, and whether the puzzle
+    entails it, given its solution.
+    """
+    result = []
+    for name, is_knight in solution.items():
+        result.append((knight(name), is_knight))
+        result.append((knave(name), not is_knight))
+    return result
+
+
+def revision():
+    """
+    Returns the current git commit, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each entailment backend on generated puzzles."
+    )
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES,
+                        help="numbers of characters to generate puzzles for")
+    parser.add_argument("--puzzles", type=int, default=PUZZLES,
+                        help="puzzles of each size")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", default=OUTPUT,
+                        help="file to write JSON results to")
+    args = parser.parse_args()
+
+    results = {
+        "revision": revision(),
+        "puzzles": args.puzzles,
+        "seed": args.seed,
+        "sizes": []
+    }
+    for size in args.sizes:
+        puzzles = [generate(size, args.seed + i) for i in range(args.puzzles)]
+        statements = sum(len(puzzle[1]) for puzzle in puzzles)
+        summary = {"characters": size,
+                   "statements": statements / args.puzzles,
+                   "seconds": {}}
+        print(f"{size} characters, {summary['statements']:.1f} statements")
+
+        for name, (backend, limit) in BACKENDS.items():
+            if limit is not None and 2 * size > limit:
+                continue
+            elapsed = 0
+            for knowledge, _, solution in puzzles:
+                symbols, expected = zip(*queries(solution))
+                start = time.perf_counter()
+                answers = backend(knowledge, symbols)
+                elapsed += time.perf_counter() - start
+                if list(answers) != list(expected):
+                    raise Exception(f"{name} answers a {size} character "
+                                    f"puzzle wrongly")
+            summary["seconds"][name] = elapsed / args.puzzles
+            print(f"  {name}: {1000 * elapsed / args.puzzles:.1f}ms "
+                  f"per puzzle")
+        results["sizes"].append(summary)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Random knights and knaves puzzles
+
+Each character is secretly a knight, who always tells the truth, or a
+knave, who always lies. A puzzle is generated from a hidden solution by
+adding statements that are true when said by knights and false when
+said by knaves, until the statements leave only that solution, which
+the SAT backend checks after each statement. A statement the knowledge
+already implies is skipped, so every statement rules out some model.
+
+Usage: python generator.py [characters] [seed]
+"""
+
+import random
+import string
+import sys
+
+from logic import And, Implication, Not, Or, Symbol
+from sat import KnowledgeBase
+
+CHARACTERS = 4
+
+# Statements tried before giving up on a puzzle
+ATTEMPTS = 100000
+
+
+def names(count):
+    """
+    Returns the names of `count` characters: A to Z, then A2 to Z2
+    and so on.
+    """
+    letters = string.ascii_uppercase
+    return [
+        letters[i % 26] + (str(i // 26 + 1) if i >= 26 else "")
+        for i in range(count)
+    ]
+
+
+def knight(name):
+    return Symbol(f"{name} is a Knight")
+
+
+def knave(name):
+    return Symbol(f"{name} is a Knave")
+
+
+def claims(names, generator):
+    """
+    Returns the text of a random claim about the characters,
+    and the sentence that is true exactly when the claim is.
+    """
+    x, y = generator.sample(names, 2) if len(names) > 1 else names * 2
+    kind = generator.randrange(6 if x != y else 2)
+    if kind == 0:
+        return f"{x} is a knight.", knight(x)
+    if kind == 1:
+        return f"{x} is a knave.", knave(x)
+    if kind == 2:
+        return (f"{x} and {y} are the same kind.",
+                Or(And(knight(x), knight(y)), And(knave(x), knave(y))))
+    if kind == 3:
+        return (f"{x} and {y} are of different kinds.",
+                Or(And(knight(x), knave(y)), And(knave(x), knight(y))))
+    if kind == 4:
+        return f"{x} or {y} is a knight.", Or(knight(x), knight(y))
+    return f"{x} and {y} are both knaves.", And(knave(x), knave(y))
+
+
+def generate(count=CHARACTERS, seed=None):
+    """
+    Returns a puzzle with `count` characters and exactly one solution:
+    the knowledge as a logic.py sentence, the statements as lines of
+    text, and the solution as a dictionary from each character's name
+    to True for a knight and False for a knave.
+    """
+    generator = random.Random(seed)
+    characters = names(count)
+    solution = {name: generator.random() < 0.5 for name in characters}
+
+    # Every character is a knight or a knave, but not both
+    sentences = []
+    for name in characters:
+        sentences.append(Or(knight(name), knave(name)))
+        sentences.append(Not(And(knight(name), knave(name))))
+    knowledge_base = KnowledgeBase(*sentences)
+
+    model = {}
+    for name in characters:
+        model[knight(name).name] = solution[name]
+        model[knave(name).name] = not solution[name]
+
+    statements = []
+    unsolved = list(characters)
+    for _ in range(ATTEMPTS):
+        if not unsolved:
+            break
+
+        # Every claim mentions a character the statements have not yet
+        # settled, so that each one can narrow down the solution
+        speaker = generator.choice(characters)
+        subject = generator.choice(unsolved)
+        about = sorted({subject, generator.choice(characters)})
+        text, claim = claims(about, generator)
+        if claim.evaluate(model) != solution[speaker]:
+            continue
+
+        # Keep only statements that rule out some remaining model,
+        # so the puzzle has no repeated or already implied statements
+        line = f'{speaker} says "{text}"'
+        statement = And(Implication(knight(speaker), claim),
+                        Implication(knave(speaker), Not(claim)))
+        if line in statements or knowledge_base.entails(statement):
+            continue
+        sentences.append(statement)
+        knowledge_base.add(statement)
+        statements.append(line)
+        unsolved = [
+            name for name in unsolved
+            if not knowledge_base.entails(
+                knight(name) if solution[name] else knave(name)
+            )
+        ]
+    if unsolved:
+        raise Exception(f"no unique puzzle found in {ATTEMPTS} statements")
+
+    return And(*sentences), statements, solution
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python generator.py [characters] [seed]")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else CHARACTERS
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    knowledge, statements, solution = generate(count, seed)
+    for statement in statements:
+        print(statement)
+    print("Solution:")
+    for name, is_knight in solution.items():
+        print(f"    {knight(name) if is_knight else knave(name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,72 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    A logical sentence. Sentences other than conjunctions are immutable
+    and hash-consed: constructing a sentence equal to one that already
+    exists returns the existing object, so equal subformulas are shared,
+    and each sentence computes its hash once and its symbols at most
+    once. Conjunctions can grow with And.add, so each And is a new
+    object, and stops growing once it is part of another sentence.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Maps the class and arguments of each sentence to a weak reference
+    # to it. Arguments that are sentences are keyed by their id, which
+    # only a sentence built after they are freed can reuse, and that
+    # sentence replaces the dead entry. Dead entries are pruned each
+    # time the table doubles in size.
+    interned = {}
+    limit = 1024
+
+    @classmethod
+    def intern(cls, arguments):
+        """
+        Returns the sentence of this class built from a tuple of
+        sentences, creating it if there is none.
+        """
+        key = (cls, *map(id, arguments))
+        reference = Sentence.interned.get(key)
+        if reference is not None:
+            sentence = reference()
+            if sentence is not None:
+                return sentence
+        sentence = object.__new__(cls)
+        sentence.set(arguments)
+        for argument in arguments:
+            if type(argument) is And:
+                argument._frozen = True
+        Sentence.interned[key] = weakref.ref(sentence)
+        if len(Sentence.interned) > Sentence.limit:
+            Sentence.prune()
+        return sentence
+
+    @staticmethod
+    def prune():
+        """Drops the entries of freed sentences from the intern table."""
+        Sentence.interned = {
+            key: reference
+            for key, reference in Sentence.interned.items()
+            if reference() is not None
+        }
+        Sentence.limit = max(1024, 2 * len(Sentence.interned))
+
+    def set(self, arguments):
+        """Stores the arguments of a new sentence and its hash."""
+        raise Exception("nothing to set")
+
+    def arguments(self):
+        """Returns the tuple of arguments the sentence was built from."""
+        raise Exception("no arguments")
+
+    def __reduce__(self):
+        return (type(self), self.arguments())
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +78,15 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns the cached frozenset of all symbols in the sentence."""
+        if self._symbols is None:
+            self._symbols = frozenset().union(*[
+                argument.symbol_set() for argument in self.arguments()
+            ])
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +116,37 @@ class Sentence():
 
 
 class Symbol(Sentence):
-
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        key = (cls, name)
+        reference = Sentence.interned.get(key)
+        if reference is not None:
+            symbol = reference()
+            if symbol is not None:
+                return symbol
+        symbol = object.__new__(cls)
+        symbol.set((name,))
+        Sentence.interned[key] = weakref.ref(symbol)
+        if len(Sentence.interned) > Sentence.limit:
+            Sentence.prune()
+        return symbol
+
+    def set(self, arguments):
+        self.name, = arguments
+        self._hash = hash(("symbol", self.name))
+        self._symbols = frozenset([self.name])
+
+    def arguments(self):
+        return (self.name,)
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -70,15 +165,28 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls.intern((operand,))
+
+    def set(self, arguments):
+        self.operand, = arguments
+        self._hash = hash(("not", self.operand._hash))
+        self._symbols = None
+
+    def arguments(self):
+        return (self.operand,)
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self._hash == other._hash
+            and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +197,36 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts", "_frozen")
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+            if type(conjunct) is And:
+                conjunct._frozen = True
+        conjunction = object.__new__(cls)
+        conjunction.set(conjuncts)
+        conjunction._frozen = False
+        return conjunction
+
+    def set(self, arguments):
+        self.conjuncts = arguments
+        self._hash = hash(("and", tuple([c._hash for c in arguments])))
+        self._symbols = None
+
+    def arguments(self):
+        return self.conjuncts
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self._hash == other._hash
+            and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +235,17 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """
+        Adds a conjunct in place. Sentences built from the conjunction
+        have cached its hash and symbols, so it can only grow until it
+        is part of another sentence.
+        """
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self._frozen:
+            raise Exception("cannot add to a conjunction inside a sentence")
+        if type(conjunct) is And:
+            conjunct._frozen = True
+        self.set(self.conjuncts + (conjunct,))
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +256,31 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(disjuncts)
+
+    def set(self, arguments):
+        self.disjuncts = arguments
+        self._hash = hash(("or", tuple([d._hash for d in arguments])))
+        self._symbols = None
+
+    def arguments(self):
+        return self.disjuncts
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self._hash == other._hash
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +295,33 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern((antecedent, consequent))
+
+    def set(self, arguments):
+        self.antecedent, self.consequent = arguments
+        self._hash = hash(("implies", self.antecedent._hash,
+                           self.consequent._hash))
+        self._symbols = None
+
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication) and self._hash == other._hash
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +335,33 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern((left, right))
+
+    def set(self, arguments):
+        self.left, self.right = arguments
+        self._hash = hash(("biconditional", self.left._hash,
+                           self.right._hash))
+        self._symbols = None
+
+    def arguments(self):
+        return (self.left, self.right)
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional) and self._hash == other._hash
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,13 +373,10 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
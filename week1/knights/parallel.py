@@ -0,0 +1,136 @@
+"""
+Parallel model checking for logic.py
+
+Splits the models of a knowledge base into 2 ** k partitions by fixing
+the values of its first k symbols, and checks the partitions in a
+process pool with the bit-parallel evaluator of truthtable.py, stopping
+as soon as any partition finds a model of the knowledge where the
+query is false.
+
+Usage: python parallel.py [symbols] [processes]
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from logic import And, Implication, Not, Or, Symbol
+import truthtable
+
+SEED = 0
+SYMBOLS = 26
+
+# Partitions each process is given, so that one slow partition
+# does not leave the other processes idle at the end
+PARTITIONS = 4
+
+# Sentences and symbol names of the current check, set by `attach`
+knowledge = None
+query = None
+fixed_names = None
+free_names = None
+
+
+def attach(shared_knowledge, shared_query, shared_fixed, shared_free):
+    """
+    Stores the check each process of the pool works on.
+    """
+    global knowledge, query, fixed_names, free_names
+    knowledge = shared_knowledge
+    query = shared_query
+    fixed_names = shared_fixed
+    free_names = shared_free
+
+
+def check_partition(partition):
+    """
+    Checks if knowledge entails query in every model where fixed
+    symbol i has the value of bit i of the partition number.
+    """
+    for values, full in truthtable.chunks(free_names):
+        for i, name in enumerate(fixed_names):
+            values[name] = full if partition >> i & 1 else 0
+        cache = {}
+        known = truthtable.evaluate(knowledge, values, full, cache)
+        if known & ~truthtable.evaluate(query, values, full, cache):
+            return False
+    return True
+
+
+def model_check(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query, giving the same answers
+    as logic.model_check, with the models split into 2 ** split
+    partitions, by default enough for PARTITIONS per process.
+    """
+    processes = processes or os.cpu_count()
+    names = sorted(set.union(knowledge.symbols(), query.symbols()))
+    if split is None:
+        split = math.ceil(math.log2(processes * PARTITIONS))
+    split = min(split, len(names))
+    fixed, free = names[:split], names[split:]
+
+    with multiprocessing.Pool(
+        processes, initializer=attach,
+        initargs=(knowledge, query, fixed, free)
+    ) as pool:
+        for entailed in pool.imap_unordered(check_partition,
+                                            range(2 ** split)):
+            if not entailed:
+                pool.terminate()
+                return False
+    return True
+
+
+def workload(count, seed=SEED):
+    """
+    Returns a knowledge base of random clauses and implications over
+    `count` symbols, and a query it entails, so that checking it
+    needs every model.
+    """
+    generator = random.Random(seed)
+    symbols = [Symbol(f"P{i}") for i in range(count)]
+
+    def literal():
+        symbol = generator.choice(symbols)
+        return symbol if generator.random() < 0.5 else Not(symbol)
+
+    sentences = []
+    for _ in range(count):
+        sentences.append(Or(literal(), literal(), literal()))
+        sentences.append(Implication(literal(), Or(literal(), literal())))
+    return And(*sentences), sentences[0]
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python parallel.py [symbols] [processes]")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SYMBOLS
+    most = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    knowledge, query = workload(count)
+    models = 2 ** count
+    print(f"Checking {models} models of {count} symbols")
+
+    start = time.perf_counter()
+    expected = truthtable.model_check(knowledge, query)
+    serial = time.perf_counter() - start
+    print(f"  Serial: {serial:.2f}s, {models / serial:,.0f} models/s")
+
+    processes = 1
+    while processes <= most:
+        start = time.perf_counter()
+        if model_check(knowledge, query, processes) != expected:
+            raise Exception("parallel and serial checks disagree")
+        elapsed = time.perf_counter() - start
+        print(f"  {processes} processes: {elapsed:.2f}s, "
+              f"{models / elapsed:,.0f} models/s, "
+              f"{serial / elapsed:.2f}x serial")
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,619 @@
+"""
+SAT backend for logic.py
+
+Decides entailment without enumerating models: knowledge ∧ ¬query is
+turned into clauses by the Tseitin transformation, which adds a new
+variable for every connective so the clauses grow linearly with the
+sentence, and a conflict-driven clause learning (CDCL) solver searches
+for a model. The knowledge entails the query exactly when there is none.
+
+Literals are nonzero integers: variable v is the literal v when true
+and -v when false.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Conflicts before the first restart, scaled by the Luby sequence
+RESTART = 100
+
+# Factor the activity bump grows by after each conflict
+DECAY = 1 / 0.95
+
+# Learned clauses kept before the first deletion of the worse half
+LEARNED = 2000
+
+# Models a knowledge base keeps to answer queries without solving
+MODELS = 64
+
+
+class Solver():
+    """
+    CDCL SAT solver with two watched literals per clause, activity-based
+    branching with saved phases, first-UIP clause learning with clause
+    minimization, backjumping, restarts and deletion of learned clauses
+    that have not proved useful.
+
+    Clauses can be added between calls to solve, and solve can assume
+    literals for one call without adding them, so one solver can answer
+    many related questions while keeping what it has learned.
+    """
+
+    def __init__(self):
+        # Clauses by index, with None for deleted learned clauses
+        self.clauses = []
+        self.learned = []
+        self.quality = {}
+
+        # Map each literal to True or False while it is assigned, and
+        # to the indexes of the clauses watching it
+        self.truth = {}
+        self.watches = {}
+
+        # Indexed by variable, starting at 1
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.heap = []
+        self.bump = 1.0
+        self.limit = LEARNED
+        self.ok = True
+        self.stats = {"decisions": 0, "conflicts": 0, "propagations": 0}
+
+    def new_variable(self):
+        """
+        Returns a new variable.
+        """
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        variable = len(self.levels) - 1
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        heapq.heappush(self.heap, (0.0, variable))
+        return variable
+
+    def variables(self):
+        """
+        Returns the number of variables.
+        """
+        return len(self.levels) - 1
+
+    def value(self, literal):
+        """
+        Returns True or False for an assigned literal, otherwise None.
+        """
+        return self.truth.get(literal)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, a disjunction of literals, for this and every
+        later call to solve. Returns False if the clauses are now known
+        to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        # Drop duplicate and false literals, and the clause if it is
+        # a tautology or already true
+        clause = []
+        for literal in literals:
+            value = self.truth.get(literal)
+            if value is True or -literal in clause:
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        """
+        Stores a clause of two or more literals, watching its first two.
+        Returns the index of the clause.
+        """
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.truth[literal] = True
+        self.truth[-literal] = False
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by a clause with one unassigned
+        literal left. Returns the index of a clause with every literal
+        false, or None if there is no conflict.
+        """
+        truth = self.truth
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+        while self.head < len(trail):
+            false = -trail[self.head]
+            self.head += 1
+            self.stats["propagations"] += 1
+
+            # Move the watch of each clause watching the now false
+            # literal to another literal that is not false, if any
+            watching = watches[false]
+            kept = 0
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+                if clause is None:
+                    continue
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                other = clause[0]
+                if truth.get(other) is True:
+                    watching[kept] = index
+                    kept += 1
+                    continue
+
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if truth.get(literal) is not False:
+                        clause[1], clause[k] = literal, false
+                        watches[literal].append(index)
+                        break
+                else:
+                    watching[kept] = index
+                    kept += 1
+                    if other in truth:
+                        while i < len(watching):
+                            watching[kept] = watching[i]
+                            kept += 1
+                            i += 1
+                        del watching[kept:]
+                        return index
+                    self.assign(other, index)
+            del watching[kept:]
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns a learned clause from a conflict, with the literal that
+        becomes true after backjumping first, and the level to backjump
+        to, by resolving the conflict back to its first unique
+        implication point at the current level.
+        """
+        levels = self.levels
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        reason = conflict
+        while True:
+            clause = self.clauses[reason]
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable in seen or levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.raise_activity(variable)
+                if levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            reason = self.reasons[abs(literal)]
+            pending -= 1
+            if pending == 0:
+                break
+        learned[0] = -literal
+
+        # Leave out literals implied by the others in the clause
+        minimized = [learned[0]]
+        for other in learned[1:]:
+            reason = self.reasons[abs(other)]
+            if reason is None or not all(
+                abs(implied) in seen or levels[abs(implied)] == 0
+                for implied in self.clauses[reason][1:]
+            ):
+                minimized.append(other)
+        learned = minimized
+
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, levels[abs(learned[1])]
+
+    def raise_activity(self, variable):
+        """
+        Makes a variable involved in a conflict more likely to be
+        decided next. Assigned variables reenter the heap with their
+        new activity when they are unassigned.
+        """
+        self.activity[variable] += self.bump
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Refills the heap of variables to decide with just the
+        unassigned variables and their current activity.
+        """
+        self.heap = [(-self.activity[variable], variable)
+                     for variable in range(1, len(self.levels))
+                     if variable not in self.truth]
+        heapq.heapify(self.heap)
+
+    def backtrack(self, level):
+        """
+        Unassigns every literal above a decision level.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            del self.truth[literal]
+            del self.truth[-literal]
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+        # Variables are pushed again each time they are unassigned,
+        # so drop the stale entries once they outnumber the rest
+        if len(self.heap) > 4 * len(self.levels):
+            self.rebuild()
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity,
+        or None if every variable is assigned.
+        """
+        while self.heap:
+            _, variable = heapq.heappop(self.heap)
+            if variable not in self.truth:
+                return variable
+        for variable in range(1, len(self.levels)):
+            if variable not in self.truth:
+                return variable
+        return None
+
+    def learn(self, clause):
+        """
+        Stores a learned clause and returns its index, remembering how
+        many decision levels its literals span: clauses spanning few
+        levels are the most likely to cause propagations again.
+        """
+        index = self.watch(clause)
+        self.learned.append(index)
+        self.quality[index] = len({self.levels[abs(literal)]
+                                   for literal in clause})
+        return index
+
+    def reduce(self):
+        """
+        Deletes the worse half of the learned clauses, keeping those
+        that span only two decision levels. Only called at level 0,
+        where no deletable clause is the reason for an assignment.
+        """
+        ranked = sorted(self.learned, key=lambda index: (
+            self.quality[index], len(self.clauses[index])
+        ))
+        keep = len(ranked) // 2
+        self.learned = []
+        for position, index in enumerate(ranked):
+            if position < keep or self.quality[index] <= 2:
+                self.learned.append(index)
+            else:
+                self.clauses[index] = None
+                del self.quality[index]
+        self.limit = int(self.limit * 1.1)
+
+    def solve(self, assumptions=()):
+        """
+        Returns a model, a list of the value of every variable indexed
+        by variable, satisfying every clause and assumed literal, or
+        None if there is no such model.
+        """
+        if not self.ok:
+            return None
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return None
+
+        assumptions = list(assumptions)
+        for literal in assumptions:
+            while abs(literal) > self.variables():
+                self.new_variable()
+
+        conflicts = 0
+        restarts = 0
+        limit = RESTART * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.learn(learned))
+                self.bump *= DECAY
+                continue
+
+            if conflicts >= limit:
+                conflicts = 0
+                restarts += 1
+                limit = RESTART * luby(restarts)
+                self.backtrack(0)
+                if len(self.learned) > self.limit:
+                    self.reduce()
+                continue
+
+            # Decide the assumptions first, one level each
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.truth.get(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return None
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                model = [None] + [self.truth[variable] for variable
+                                  in range(1, len(self.levels))]
+                self.backtrack(0)
+                return model
+            self.stats["decisions"] += 1
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable,
+                        None)
+
+
+class Encoder():
+    """
+    Tseitin encoding of logical sentences into the clauses of a solver.
+
+    Every symbol and every distinct compound sentence gets one variable,
+    so shared subformulas are only encoded once.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver or Solver()
+        self.variables = {}
+        self.literals = {}
+        self.true = None
+
+    def add(self, sentence):
+        """
+        Adds a sentence that must be true. Conjunctions are added one
+        conjunct at a time and disjunctions as a single clause, so
+        neither needs a variable of its own.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause([
+                self.literal(disjunct) for disjunct in sentence.disjuncts
+            ])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def symbol(self, name):
+        """
+        Returns the variable of a symbol name.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to a sentence, adding the clauses
+        that define it to the solver the first time it is seen.
+        """
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, And):
+            if not sentence.conjuncts:
+                return self.constant()
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            literal = self.solver.new_variable()
+            for part in parts:
+                add([-literal, part])
+            add([literal] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            if not sentence.disjuncts:
+                return -self.constant()
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            literal = self.solver.new_variable()
+            for part in parts:
+                add([literal, -part])
+            add([-literal] + parts)
+        elif isinstance(sentence, Implication):
+            p = self.literal(sentence.antecedent)
+            q = self.literal(sentence.consequent)
+            literal = self.solver.new_variable()
+            add([-literal, -p, q])
+            add([literal, p])
+            add([literal, -q])
+        elif isinstance(sentence, Biconditional):
+            p = self.literal(sentence.left)
+            q = self.literal(sentence.right)
+            literal = self.solver.new_variable()
+            add([-literal, -p, q])
+            add([-literal, p, -q])
+            add([literal, p, q])
+            add([literal, -p, -q])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.literals[sentence] = literal
+        return literal
+
+    def constant(self):
+        """
+        Returns a literal that is always true.
+        """
+        if self.true is None:
+            self.true = self.solver.new_variable()
+            self.solver.add_clause([self.true])
+        return self.true
+
+    def model(self, values):
+        """
+        Returns a dictionary of the truth value of every symbol name
+        in a model found by the solver.
+        """
+        return {name: bool(values[variable])
+                for name, variable in self.variables.items()}
+
+
+class KnowledgeBase():
+    """
+    Knowledge compiled once into a solver that answers many entailment
+    queries, and that more knowledge can be added to at any time.
+
+    A query is decided by solving under the assumption that it is
+    false, so the clauses the solver learns carry over to later
+    queries, and every model found this way is kept: a later query
+    that is false in a kept model is answered without solving.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        self.models = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence to the knowledge, keeping only the models
+        that are still models of it.
+        """
+        self.encoder.add(sentence)
+        symbols = sentence.symbols()
+        self.models = [
+            model for model in self.models
+            if symbols <= model.keys() and sentence.evaluate(model)
+        ]
+
+    def entails(self, query):
+        """
+        Checks if the knowledge entails query, giving the same answers
+        as logic.model_check.
+        """
+        symbols = query.symbols()
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                return False
+
+        # The clauses defining the query's literal only name it, so they
+        # can stay in the solver without changing the knowledge
+        literal = self.encoder.literal(query)
+        values = self.encoder.solver.solve([-literal])
+        if values is None:
+            return True
+        if len(self.models) >= MODELS:
+            self.models.pop(0)
+        self.models.append(self.encoder.model(values))
+        return False
+
+    def satisfiable(self):
+        """
+        Returns True if the knowledge has a model, otherwise False.
+        """
+        if self.models:
+            return True
+        values = self.encoder.solver.solve()
+        if values is None:
+            return False
+        self.models.append(self.encoder.model(values))
+        return True
+
+
+def luby(i):
+    """
+    Returns term i, from 0, of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    """
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i = i % size
+    return 2 ** power
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of a sentence as a dictionary from symbol names to
+    truth values, or None if the sentence is unsatisfiable.
+    """
+    encoder = Encoder()
+    encoder.add(sentence)
+    for name in sentence.symbols():
+        encoder.symbol(name)
+    values = encoder.solver.solve()
+    return None if values is None else encoder.model(values)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, giving the same answers
+    as logic.model_check.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    encoder.add(Not(query))
+    return encoder.solver.solve() is None
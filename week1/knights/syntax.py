@@ -0,0 +1,209 @@
+"""
+Reading and writing logic.py sentences
+
+`parse` reads the text that Sentence.formula() writes, such as
+"(A is a Knight) => (¬(A is a Knave))", so knowledge bases can be
+kept as plain text. `dumps` and `loads` convert sentences to and from
+JSON that lists each distinct subformula once, so large generated
+knowledge bases load without parsing or running any Python source.
+"""
+
+import json
+import re
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Operators from loosest to tightest binding, as formula() writes them
+OPERATORS = ["<=>", "=>", "∨", "∧", "¬"]
+
+TOKENS = re.compile(r"(<=>|=>|∨|∧|¬|\(|\))")
+
+# Names of the kinds of node in the JSON format
+KINDS = {
+    Symbol: "symbol",
+    Not: "not",
+    And: "and",
+    Or: "or",
+    Implication: "implies",
+    Biconditional: "iff"
+}
+
+FORMAT = "logic-dag"
+VERSION = 1
+
+
+def tokenize(text):
+    """
+    Returns the operators, parentheses and symbol names of a formula.
+    A symbol name is everything between them, trimmed of spaces.
+    """
+    tokens = []
+    for part in TOKENS.split(text):
+        part = part.strip()
+        if part:
+            tokens.append(part)
+    return tokens
+
+
+class Parser():
+    """
+    Recursive descent parser over the tokens of a formula. A chain of
+    ∧ or ∨ becomes a single And or Or, and => groups to the right.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise SyntaxError(f"unexpected end of formula: {self.text!r}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        sentence = self.biconditional()
+        if self.peek() is not None:
+            raise SyntaxError(f"unexpected {self.peek()!r} in {self.text!r}")
+        return sentence
+
+    def biconditional(self):
+        left = self.implication()
+        while self.peek() == "<=>":
+            self.take()
+            left = Biconditional(left, self.implication())
+        return left
+
+    def implication(self):
+        antecedent = self.disjunction()
+        if self.peek() == "=>":
+            self.take()
+            return Implication(antecedent, self.implication())
+        return antecedent
+
+    def disjunction(self):
+        disjuncts = [self.conjunction()]
+        while self.peek() == "∨":
+            self.take()
+            disjuncts.append(self.conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction(self):
+        conjuncts = [self.negation()]
+        while self.peek() == "∧":
+            self.take()
+            conjuncts.append(self.negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation(self):
+        token = self.take()
+        if token == "¬":
+            return Not(self.negation())
+        if token == "(":
+            sentence = self.biconditional()
+            if self.take() != ")":
+                raise SyntaxError(f"expected ')' in {self.text!r}")
+            return sentence
+        if token in OPERATORS or token == ")":
+            raise SyntaxError(f"unexpected {token!r} in {self.text!r}")
+        return Symbol(token)
+
+
+def parse(text):
+    """
+    Returns the sentence written by Sentence.formula() as text.
+
+    The result is equivalent to the original sentence, and equal to it
+    unless the original had an And or Or of a single sentence, which
+    formula() writes as just that sentence.
+
+    An And or Or of no sentences is unsupported: formula() writes it as
+    nothing, so And(A, And()) and And(A, Or()) both give "A ∧ ", and a
+    formula with one raises SyntaxError. Use dumps and loads to keep
+    such sentences.
+    """
+    return Parser(text).parse()
+
+
+def dumps(sentences):
+    """
+    Returns JSON for a list of sentences, in which every distinct
+    subformula is a node listed once, after the nodes it is built from.
+    """
+    nodes = []
+    index = {}
+
+    def add(root):
+        # Number each node after its arguments, without recursion,
+        # so deep sentences do not hit the recursion limit
+        stack = [(root, False)]
+        while stack:
+            sentence, ready = stack.pop()
+            if sentence in index:
+                continue
+            if isinstance(sentence, Symbol):
+                node = ["symbol", sentence.name]
+            elif ready:
+                arguments = [index[argument]
+                             for argument in sentence.arguments()]
+                node = [KINDS[type(sentence)]] + arguments
+            else:
+                stack.append((sentence, True))
+                for argument in reversed(sentence.arguments()):
+                    if argument not in index:
+                        stack.append((argument, False))
+                continue
+            index[sentence] = len(nodes)
+            nodes.append(node)
+        return index[root]
+
+    roots = [add(sentence) for sentence in sentences]
+    return json.dumps({
+        "format": FORMAT,
+        "version": VERSION,
+        "nodes": nodes,
+        "roots": roots
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text):
+    """
+    Returns the list of sentences in JSON written by dumps.
+    """
+    data = json.loads(text)
+    if data.get("format") != FORMAT or data.get("version") != VERSION:
+        raise ValueError("not a logic-dag version 1 document")
+
+    constructors = {kind: cls for cls, kind in KINDS.items()}
+    built = []
+    for kind, *arguments in data["nodes"]:
+        if kind == "symbol":
+            built.append(Symbol(arguments[0]))
+        else:
+            built.append(constructors[kind](
+                *[built[argument] for argument in arguments]
+            ))
+    return [built[root] for root in data["roots"]]
+
+
+def dump(sentences, filename):
+    """
+    Writes a list of sentences to a file as JSON.
+    """
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(dumps(sentences))
+
+
+def load(filename):
+    """
+    Returns the list of sentences in a JSON file written by dump.
+    """
+    with open(filename, encoding="utf-8") as f:
+        return loads(f.read())
@@ -0,0 +1,118 @@
+"""
+Bit-parallel truth tables for logic.py
+
+Evaluates a sentence in many models at once. Each model is one bit
+position of a Python integer, each symbol is an integer whose bits are
+its value in every model, and each connective becomes one bitwise
+operation on whole integers, so a sentence is walked once per chunk
+of models rather than once per model.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Symbols enumerated within one integer; models of any further symbols
+# are checked one chunk of 2 ** CHUNK models at a time
+CHUNK = 22
+
+
+def columns(width):
+    """
+    Returns a list of `width` integers of 2 ** width bits, where bit m
+    of integer i is bit i of m, so that together they list every model
+    of `width` symbols.
+    """
+    size = 1 << width
+    result = []
+    for i in range(width):
+        period = 1 << (i + 1)
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        while period < size:
+            column |= column << period
+            period *= 2
+        result.append(column)
+    return result
+
+
+def evaluate(sentence, values, full, cache=None):
+    """
+    Returns an integer whose bits are the truth of a sentence in each
+    model, given a dictionary mapping symbol names to integers of
+    their values and the integer with every model's bit set.
+    """
+    if cache is None:
+        cache = {}
+    key = id(sentence)
+    if key in cache:
+        return cache[key]
+
+    if isinstance(sentence, Symbol):
+        try:
+            result = values[sentence.name]
+        except KeyError:
+            raise Exception(f"variable {sentence.name} not in model")
+    elif isinstance(sentence, Not):
+        result = full ^ evaluate(sentence.operand, values, full, cache)
+    elif isinstance(sentence, And):
+        result = full
+        for conjunct in sentence.conjuncts:
+            result &= evaluate(conjunct, values, full, cache)
+            if not result:
+                break
+    elif isinstance(sentence, Or):
+        result = 0
+        for disjunct in sentence.disjuncts:
+            result |= evaluate(disjunct, values, full, cache)
+            if result == full:
+                break
+    elif isinstance(sentence, Implication):
+        result = (full ^ evaluate(sentence.antecedent, values, full, cache)) | (
+            evaluate(sentence.consequent, values, full, cache)
+        )
+    elif isinstance(sentence, Biconditional):
+        result = full ^ (evaluate(sentence.left, values, full, cache)
+                         ^ evaluate(sentence.right, values, full, cache))
+    else:
+        raise TypeError("must be a logical sentence")
+    cache[key] = result
+    return result
+
+
+def chunks(names, chunk=CHUNK):
+    """
+    Yields a dictionary mapping every symbol name to an integer of its
+    values, and the integer with every model's bit set, for each chunk
+    of the models of the names.
+    """
+    names = sorted(names)
+    inner, outer = names[:chunk], names[chunk:]
+    full = (1 << (1 << len(inner))) - 1
+    values = dict(zip(inner, columns(len(inner))))
+    for fixed in range(1 << len(outer)):
+        for i, name in enumerate(outer):
+            values[name] = full if fixed >> i & 1 else 0
+        yield values, full
+
+
+def model_check(knowledge, query, chunk=CHUNK):
+    """
+    Checks if knowledge base entails query, giving the same answers
+    as logic.model_check.
+    """
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    for values, full in chunks(symbols, chunk):
+        cache = {}
+        known = evaluate(knowledge, values, full, cache)
+        if known & ~evaluate(query, values, full, cache):
+            return False
+    return True
+
+
+def count_models(sentence, chunk=CHUNK):
+    """
+    Returns the number of models of the sentence's symbols
+    in which it is true.
+    """
+    return sum(
+        bin(evaluate(sentence, values, full)).count("1")
+        for values, full in chunks(sentence.symbols(), chunk)
+    )